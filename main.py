@@ -10,23 +10,2316 @@ import os
 import time
 import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from PIL import Image, ImageGrab, ImageTk, ImageDraw
-import pythoncom
-import win32clipboard
 from docx import Document
 from docx.shared import Inches, RGBColor
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml.shape import CT_Inline
+from docx.parts.image import ImagePart
 from datetime import datetime
 import tempfile
 import subprocess
 import ctypes
 from ctypes import wintypes
-import win32gui
-import win32con
-import pyautogui
-import win32com.client
+import numpy as np
 import xml.etree.ElementTree as ET
 import base64
+import hashlib
+import io
+import zlib
+import json
+import shutil
+import queue
+import struct
+import multiprocessing
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# Windows-only modules. Without them the hotkey, capture backend and session
+# store classes still import, so they can be tested on other platforms.
+if sys.platform == "win32":
+    import pythoncom
+    import win32clipboard
+    import win32gui
+    import win32con
+    import pyautogui
+    import win32com.client
+
+
+# Per-user settings and session data live here (settings.json, regions.json, sessions/, journal/)
+SETTINGS_DIR = os.path.join(os.environ.get("APPDATA", os.path.expanduser("~")), "SnipIT")
+
+DEFAULT_SETTINGS = {
+    # Session store: number of decoded images kept in RAM and the total
+    # memory budget before older shots are spilled to disk
+    "hot_images": 3,
+    "memory_budget_mb": 512,
+    # "tiered" keeps every shot as PNG; "delta" keeps only the tiles that
+    # changed since the previous capture (best for long full-screen sessions)
+    "storage_mode": "tiered",
+    "tile_size": 64,
+    "keyframe_interval": 30,
+    # Processes used to encode images when exporting (0 = one per CPU core)
+    "export_workers": 0,
+    # One of EXPORT_PROFILES
+    "export_profile": "standard",
+    # Screen capture backend: "imagegrab", "gdi" (reuses its device context
+    # and buffers between grabs) or "synthetic" (generated frames for tests)
+    "capture_backend": "imagegrab",
+    # Full screen captures: "current" (monitor under the cursor), "all"
+    # (the whole virtual desktop), "primary" or a monitor number (1, 2, ...
+    # counted left to right)
+    "capture_monitor": "current",
+    # Partial capture: "countdown" selects on the live screen and grabs after
+    # a 5 second countdown (for dropdowns); "freeze" grabs once when the
+    # capture starts, selects on that frozen image and crops it; "change"
+    # watches the selection and grabs once its content changed and settled
+    "partial_capture_mode": "countdown",
+    # "change" trigger: samples per second, how long the region must stay
+    # still, when to capture anyway, and the fraction of the sampled grid
+    # that must differ to count as a change
+    "change_sample_hz": 15,
+    "change_settle_ms": 300,
+    "change_timeout_s": 10,
+    "change_threshold": 0.01,
+    # Global hotkeys: action -> key combination such as "ctrl+alt+f"
+    "hotkeys": {
+        "full": "ctrl+alt+f",
+        "partial": "ctrl+alt+p",
+        "replay": "ctrl+alt+r",
+        "window": "ctrl+alt+w",
+        # Re-capture the saved region named by repeat_region; a saved region
+        # can get its own hotkey as "region:<name>"
+        "region": "ctrl+alt+l",
+    },
+    # Capture hotkeys pressed while a capture is running wait in a queue of
+    # this depth. When it is full, "drop_newest" ignores the new press and
+    # "drop_oldest" discards the oldest waiting one; "coalesce" also merges
+    # a press into a waiting request for the same capture
+    "capture_queue_size": 8,
+    "capture_queue_policy": "drop_newest",
+    # Saved region the "region" hotkey captures ("last" is the most recent
+    # partial capture selection), and whether it opens the markup window
+    "repeat_region": "last",
+    "region_markup": False,
+    # Pixels around the window captured by the "window" hotkey (clipped to
+    # the window's monitor)
+    "window_padding": 50,
+    # Screenshots waiting for the background PNG encoder before new ones are
+    # left for the export to encode
+    "encode_queue_size": 8,
+    # Scheduled capture (toolbar right-click menu): "interval" grabs every
+    # interval_seconds until stopped, "burst" grabs burst_count frames at
+    # burst_rate_hz. Only frames where more than scheduled_change_threshold
+    # of the pixels differ from the last kept frame are kept, at most
+    # scheduled_max_frames. scheduled_region is [left, top, right, bottom]
+    # or the name of a saved region, or null for the whole screen
+    "interval_seconds": 5,
+    "burst_count": 10,
+    "burst_rate_hz": 5,
+    "scheduled_change_threshold": 0.005,
+    "scheduled_max_frames": 500,
+    "scheduled_region": None,
+    # Instant replay: keep the last replay_seconds of frames grabbed at
+    # replay_fps (PNG-compressed, at most replay_budget_mb) so the "replay"
+    # hotkey can add them to the session; 0 turns it off
+    "replay_seconds": 0,
+    "replay_fps": 2,
+    "replay_budget_mb": 64,
+    # Open the finished document in Word (it is a temporary file then);
+    # false asks where to save it instead
+    "open_in_word": True,
+    # Append every capture to a journal on disk so a crashed or closed
+    # session can be resumed; journal writes are fsynced in batches
+    "journal": True,
+    "journal_batch_ms": 200,
+}
+
+
+# Screenshots are embedded in the Word document at this width
+EMBED_WIDTH_INCHES = 5.5
+
+# Export quality profiles: the resolution images are downsampled to at the
+# embed width (None keeps the captured resolution) and the JPEG quality used
+# for photo-like content. "archival" embeds the original lossless PNGs.
+EXPORT_PROFILES = {
+    "draft": {"dpi": 96, "jpeg_quality": 70},
+    "standard": {"dpi": 150, "jpeg_quality": 85},
+    "archival": {"dpi": None, "jpeg_quality": None},
+}
+
+
+# Windows RegisterHotKey modifier flags and virtual key codes
+HOTKEY_MODIFIERS = {"alt": 0x0001, "ctrl": 0x0002, "control": 0x0002, "shift": 0x0004, "win": 0x0008}
+MOD_NOREPEAT = 0x4000
+NAMED_KEYS = {
+    "space": 0x20, "enter": 0x0D, "tab": 0x09, "esc": 0x1B, "escape": 0x1B,
+    "printscreen": 0x2C, "prtsc": 0x2C, "insert": 0x2D, "delete": 0x2E,
+    "home": 0x24, "end": 0x23, "pageup": 0x21, "pagedown": 0x22,
+}
+
+
+def load_settings():
+    """Load settings.json from SETTINGS_DIR on top of DEFAULT_SETTINGS"""
+    settings = dict(DEFAULT_SETTINGS)
+    settings_path = os.path.join(SETTINGS_DIR, "settings.json")
+    try:
+        with open(settings_path, "r", encoding="utf-8") as f:
+            for key, value in json.load(f).items():
+                # Nested tables such as "hotkeys" only override the keys given
+                if isinstance(settings.get(key), dict) and isinstance(value, dict):
+                    settings[key] = {**settings[key], **value}
+                else:
+                    settings[key] = value
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"✗ Failed to load settings from {settings_path}: {e}")
+    return settings
+
+
+def png_bytes(image, compress_level=6):
+    """Encode a PIL image to PNG bytes in memory"""
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", compress_level=compress_level)
+    return buffer.getvalue()
+
+
+def is_flat_image(image):
+    """True for UI-like images where 256 colours cover nearly every pixel"""
+    colors = image.getcolors(maxcolors=image.width * image.height)
+    if len(colors) <= 256:
+        return True
+    counts = sorted((count for count, color in colors), reverse=True)
+    return sum(counts[:256]) >= 0.9 * image.width * image.height
+
+
+def markup_key(markups):
+    """Short hash of a markup list, "" for a shot without markups"""
+    if not markups:
+        return ""
+    return hashlib.blake2b(json.dumps(markups, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def render_markups(image, markups, source_size=None):
+    """
+    Composite vector markups onto a copy of image at the image's own resolution.
+    
+    Markup coordinates are in pixels of the source image of size source_size
+    (default: image itself), so the same list renders crisply onto the
+    full-resolution capture or onto a downsampled export.
+    """
+    if not markups:
+        return image
+    source_width, source_height = source_size or image.size
+    scale_x = image.width / source_width
+    scale_y = image.height / source_height
+    
+    image = image.copy()
+    draw = ImageDraw.Draw(image)
+    for markup in markups:
+        if markup["type"] == "draw":
+            points = [(x * scale_x, y * scale_y) for x, y in markup["points"]]
+            # The whole stroke in a single call
+            draw.line(points, fill=markup["color"], width=2, joint="curve")
+            continue
+        # Boxes may have been dragged in any direction
+        box = [min(markup["x1"], markup["x2"]) * scale_x, min(markup["y1"], markup["y2"]) * scale_y,
+               max(markup["x1"], markup["x2"]) * scale_x, max(markup["y1"], markup["y2"]) * scale_y]
+        if markup["type"] == "rectangle":
+            draw.rectangle(box, outline=markup["color"], width=2)
+        elif markup["type"] == "circle":
+            draw.ellipse(box, outline=markup["color"], width=2)
+    return image
+
+
+def encode_for_export(image, profile, markups=None):
+    """
+    Encode an image for the Word export under one of EXPORT_PROFILES.
+    
+    The image is downsampled to the profile's DPI at the embed width, then
+    any markups are drawn on at that output resolution. Flat UI content
+    becomes a PNG-8 palette image and photo-like content a JPEG. Word has no
+    reliable WebP support, so WebP is never used. Returns
+    (data, content_type, ext, codec).
+    """
+    dpi = EXPORT_PROFILES[profile]["dpi"]
+    if dpi is None:
+        return png_bytes(render_markups(image, markups)), "image/png", "png", "PNG"
+    
+    source_size = image.size
+    target_width = int(EMBED_WIDTH_INCHES * dpi)
+    if image.width > target_width:
+        target_height = max(1, round(image.height * target_width / image.width))
+        image = image.resize((target_width, target_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    image = render_markups(image, markups, source_size)
+    
+    # Keep transparency lossless
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        return png_bytes(image), "image/png", "png", "PNG"
+    
+    image = image.convert("RGB")
+    if is_flat_image(image):
+        palette_image = image.quantize(colors=256, method=Image.Quantize.MEDIANCUT,
+                                       dither=Image.Dither.NONE)
+        return png_bytes(palette_image), "image/png", "png", "PNG-8"
+    
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=EXPORT_PROFILES[profile]["jpeg_quality"], optimize=True)
+    return buffer.getvalue(), "image/jpeg", "jpeg", "JPEG"
+
+
+def job_image(job):
+    """Rebuild the image of an encode job: ("png", bytes) or ("raw", mode, size, pixels)"""
+    if job[0] == "png":
+        return Image.open(io.BytesIO(job[1]))
+    _, mode, size, pixels = job
+    return Image.frombytes(mode, size, pixels)
+
+
+def encode_png(job):
+    """Encode an encode job to PNG bytes - runs in the export worker processes"""
+    return png_bytes(job_image(job))
+
+
+def encode_export(job, profile):
+    """Encode an (encode job, markups) pair for an export profile - runs in the export worker processes"""
+    source, markups = job
+    return encode_for_export(job_image(source), profile, markups)
+
+
+def encode_in_pool(jobs, workers, encode=encode_png):
+    """
+    Run encode over jobs in a process pool and yield the results in job order.
+    
+    Only a few jobs per worker are in flight at a time so the raw pixels of the
+    whole session are never queued up at once.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield encode(job)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for job in jobs:
+            in_flight.append(pool.submit(encode, job))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+class StoredImage:
+    """One screenshot image in the session store, in whichever tier it currently lives"""
+    
+    def __init__(self, image, digest, size=None, mode=None):
+        self.image = image      # decoded PIL image (hot tier)
+        self.data = None        # PNG bytes in memory (warm tier)
+        self.path = None        # PNG file in the session directory (cold tier)
+        self.size = image.size if image is not None else size
+        self.mode = image.mode if image is not None else mode
+        self.digest = digest    # content hash shared by byte-identical captures
+        self.frame = None       # DeltaFrame when the store runs in delta mode
+        self.exports = {}       # markup key -> (profile, data, content_type, ext, codec) for the Word export
+    
+    def decoded_bytes(self):
+        """Approximate RAM used by the decoded image"""
+        return self.size[0] * self.size[1] * len(self.mode)
+
+
+def image_digest(image):
+    """Content hash of an image's mode, size and pixels"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class DeltaFrame:
+    """A frame stored as the zlib-compressed tiles that changed since its base frame"""
+    
+    def __init__(self, base, size, channels, indices, blob):
+        self.base = base          # previous DeltaFrame, None for a keyframe
+        self.size = size
+        self.channels = channels
+        self.indices = indices    # flat indexes of the tiles stored in blob
+        self.blob = blob          # None once spilled to disk
+        self.path = None          # file holding the blob once spilled
+    
+    def nbytes(self):
+        """Bytes kept in memory"""
+        return (len(self.blob) if self.blob is not None else 0) + self.indices.nbytes
+    
+    def load_blob(self):
+        if self.blob is not None:
+            return self.blob
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class TileDeltaCodec:
+    """
+    Delta storage for consecutive captures.
+    
+    Each frame is split into tile_size x tile_size tiles and compared with the
+    previous frame tile by tile with NumPy. Only tiles with any changed pixel
+    are kept, so rebuilt frames are exact; every keyframe_interval frames (or when the
+    frame size changes) all tiles are kept so rebuilding a frame never walks
+    a long chain.
+    """
+    
+    # Frames from these modes map to a uint8 (height, width, channels) array
+    CHANNELS = {"L": 1, "RGB": 3, "RGBA": 4}
+    
+    def __init__(self, tile_size=64, keyframe_interval=30):
+        self.tile_size = max(8, int(tile_size) // 8 * 8)
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self._prev_frame = None
+        self._prev_padded = None    # padded pixels of the previous frame
+        self._since_keyframe = 0
+        self._cache = (None, None)  # last decoded (frame, padded array)
+    
+    def supports(self, image):
+        return image.mode in self.CHANNELS
+    
+    def encode(self, image):
+        """Return a DeltaFrame for image, relative to the previously encoded frame"""
+        channels = self.CHANNELS[image.mode]
+        padded = self._padded(np.asarray(image), channels)
+        tiles = self._tiles(padded)
+        tile_rows, tile_cols = tiles.shape[:2]
+        flat = tiles.reshape(tile_rows * tile_cols, -1)
+        
+        prev = self._prev_frame
+        keyframe = (prev is None or prev.size != image.size or prev.channels != channels
+                    or self._since_keyframe >= self.keyframe_interval)
+        if keyframe:
+            indices = np.arange(len(flat), dtype=np.int32)
+            self._since_keyframe = 0
+        else:
+            changed = (tiles != self._tiles(self._prev_padded)).any(axis=(2, 3, 4))
+            indices = np.flatnonzero(changed).astype(np.int32)
+            self._since_keyframe += 1
+        
+        blob = zlib.compress(flat[indices].tobytes(), 1)
+        frame = DeltaFrame(None if keyframe else prev, image.size, channels, indices, blob)
+        self._prev_frame = frame
+        self._prev_padded = padded
+        return frame
+    
+    def decode(self, frame):
+        """Rebuild the full image of a frame"""
+        padded = self._decode_padded(frame)
+        width, height = frame.size
+        pixels = padded[:height, :width]
+        if frame.channels == 1:
+            pixels = pixels[:, :, 0]
+        return Image.fromarray(np.ascontiguousarray(pixels))
+    
+    def _decode_padded(self, frame):
+        cached_frame, cached = self._cache
+        if cached_frame is frame:
+            return cached
+        
+        if frame.base is None:
+            width, height = frame.size
+            padded = np.zeros((self._round_up(height), self._round_up(width), frame.channels),
+                              dtype=np.uint8)
+        else:
+            padded = self._decode_padded(frame.base).copy()
+        
+        tiles = self._tiles(padded)
+        tile_cols = tiles.shape[1]
+        changed = np.frombuffer(zlib.decompress(frame.load_blob()), dtype=np.uint8)
+        tiles[frame.indices // tile_cols, frame.indices % tile_cols] = \
+            changed.reshape((len(frame.indices),) + tiles.shape[2:])
+        
+        self._cache = (frame, padded)
+        return padded
+    
+    def _round_up(self, length):
+        return -(-length // self.tile_size) * self.tile_size
+    
+    def _padded(self, pixels, channels):
+        """Pad a frame to whole tiles as a (height, width, channels) array"""
+        pixels = pixels.reshape(pixels.shape[0], pixels.shape[1], channels)
+        height, width = pixels.shape[:2]
+        padded = np.zeros((self._round_up(height), self._round_up(width), channels), dtype=np.uint8)
+        padded[:height, :width] = pixels
+        return padded
+    
+    def _tiles(self, padded):
+        """View a padded frame as (tile_rows, tile_cols, tile, tile, channels)"""
+        size = self.tile_size
+        height, width, channels = padded.shape
+        return padded.reshape(height // size, size, width // size, size, channels).swapaxes(1, 2)
+
+
+def process_running(pid):
+    """True if a process with this id is running"""
+    if sys.platform != "win32":
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+    
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    STILL_ACTIVE = 259
+    ERROR_ACCESS_DENIED = 5
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return kernel32.GetLastError() == ERROR_ACCESS_DENIED
+    try:
+        code = wintypes.DWORD()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        return code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+class SessionStore:
+    """
+    Tiered storage behind ScreenshotTool.screenshots.
+    
+    The newest shots are kept as decoded PIL images, older shots are kept as
+    PNG bytes in memory and, once the memory budget is exceeded, the oldest
+    are spilled to a session directory on disk. Images are only decoded again
+    when they are asked for with image(). Byte-identical captures share one
+    StoredImage. All methods are thread-safe so the background encoder can
+    attach PNG bytes while the UI keeps capturing.
+    
+    In "delta" storage mode shots are kept as DeltaFrames instead of PNG
+    and are only encoded to PNG on export.
+    """
+    
+    SESSIONS_DIR = os.path.join(SETTINGS_DIR, "sessions")
+    
+    def __init__(self, hot_images=3, memory_budget_mb=512, session_dir=None,
+                 storage_mode="tiered", tile_size=64, keyframe_interval=30):
+        self.delta = TileDeltaCodec(tile_size, keyframe_interval) if storage_mode == "delta" else None
+        self.hot_images = max(1, int(hot_images))
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.session_dir = session_dir
+        self.memory_used = 0
+        self._shots = []
+        self._hot = OrderedDict()  # StoredImage -> None, least recently used first
+        self._by_digest = {}       # content hash -> StoredImage
+        self._spilled = 0
+        self._lock = threading.RLock()
+    
+    def __len__(self):
+        return len(self._shots)
+    
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._shots))
+    
+    def __getitem__(self, index):
+        return self._shots[index]
+    
+    def append(self, shot):
+        """Add a shot dict ({'image', 'comment', 'timestamp', optional 'markups'}) and return its index"""
+        record = self._record(shot)
+        image = record.pop('image')
+        digest = image_digest(image)
+        
+        with self._lock:
+            stored = self._by_digest.get(digest)
+            if stored is not None:
+                # Same pixels as an earlier shot - share its buffer
+                print("✓ Duplicate of an earlier screenshot, sharing its image")
+                record['stored'] = stored
+                self._shots.append(record)
+                return len(self._shots) - 1
+            
+            stored = StoredImage(image, digest)
+            if self.delta and self.delta.supports(image):
+                stored.frame = self.delta.encode(image)
+                self.memory_used += stored.frame.nbytes()
+            self._by_digest[digest] = stored
+            record['stored'] = stored
+            self._shots.append(record)
+            self._hot[stored] = None
+            self.memory_used += stored.decoded_bytes()
+            self._enforce_budget()
+            return len(self._shots) - 1
+    
+    def append_encoded(self, shot, data, size, mode, digest):
+        """
+        Add a shot whose image is already PNG-encoded and return its index.
+        
+        data goes straight into the warm tier as the same bytes object - it is
+        neither decoded nor copied. digest is the image_digest() of its pixels.
+        """
+        record = self._record(shot)
+        with self._lock:
+            stored = self._by_digest.get(digest)
+            if stored is None:
+                stored = StoredImage(None, digest, size, mode)
+                stored.data = data
+                self.memory_used += len(data)
+                self._by_digest[digest] = stored
+            record['stored'] = stored
+            self._shots.append(record)
+            self._enforce_budget()
+            return len(self._shots) - 1
+    
+    def image(self, index):
+        """Return the decoded PIL image of a shot, promoting it to the hot tier"""
+        with self._lock:
+            stored = self._shots[index]['stored']
+            if stored.image is not None:
+                self._hot.move_to_end(stored)
+                return stored.image
+            
+            if stored.data is not None:
+                image = Image.open(io.BytesIO(stored.data))
+            elif stored.path is not None:
+                image = Image.open(stored.path)
+            else:
+                image = self.delta.decode(stored.frame)
+            image.load()
+            
+            stored.image = image
+            self._hot[stored] = None
+            self.memory_used += stored.decoded_bytes()
+            self._enforce_budget(keep=stored)
+            return image
+    
+    def encoded(self, index):
+        """Return the PNG bytes of a shot without keeping a decoded copy around"""
+        with self._lock:
+            stored = self._shots[index]['stored']
+            if stored.data is not None:
+                return stored.data
+            if stored.path is not None:
+                with open(stored.path, "rb") as f:
+                    return f.read()
+            image = stored.image
+            if image is None:
+                image = self.delta.decode(stored.frame)
+        return png_bytes(image)
+    
+    def hot_image(self, index):
+        """Return the decoded image of a shot if it is still in the hot tier, else None"""
+        with self._lock:
+            return self._shots[index]['stored'].image
+    
+    def needs_png(self, index):
+        """True if a shot has no PNG bytes yet and should get them in the background"""
+        with self._lock:
+            stored = self._shots[index]['stored']
+            # Delta frames are already compact, PNG bytes would only add memory
+            return stored.frame is None and stored.data is None and stored.path is None
+    
+    def png_size(self, index):
+        """Size of the full-resolution PNG of a shot, None if it was never encoded"""
+        with self._lock:
+            stored = self._shots[index]['stored']
+            if stored.data is not None:
+                return len(stored.data)
+            if stored.path is not None:
+                return os.path.getsize(stored.path)
+            return None
+    
+    def export_source(self, index):
+        """Encode job for a shot: its PNG bytes if it has them, else its raw pixels"""
+        with self._lock:
+            stored = self._shots[index]['stored']
+            if stored.data is not None or stored.path is not None:
+                return ("png", self.encoded(index))
+            image = stored.image
+            if image is None:
+                image = self.delta.decode(stored.frame)
+            return ("raw", image.mode, image.size, image.tobytes())
+    
+    def markups(self, index):
+        """The vector markups of a shot, in its image's pixel coordinates"""
+        with self._lock:
+            return list(self._shots[index]['markups'])
+    
+    def set_markups(self, index, markups):
+        """Replace the markups of a shot, dropping export bytes no shot uses any more"""
+        with self._lock:
+            record = self._shots[index]
+            record['markups'] = list(markups)
+            record['markup_key'] = markup_key(record['markups'])
+            
+            stored = record['stored']
+            in_use = {other['markup_key'] for other in self._shots if other['stored'] is stored}
+            for key in list(stored.exports):
+                if key not in in_use:
+                    self.memory_used -= len(stored.exports.pop(key)[1])
+    
+    def pending_exports(self, profile):
+        """
+        Indexes of shots without export bytes for profile, one per shared image
+        and markup list. For the archival profile only annotated shots need
+        export bytes, the others embed their stored PNG.
+        """
+        with self._lock:
+            pending = {}
+            for index, record in enumerate(self._shots):
+                stored = record['stored']
+                if EXPORT_PROFILES[profile]["dpi"] is None and not record['markups']:
+                    continue
+                export = stored.exports.get(record['markup_key'])
+                if export is None or export[0] != profile:
+                    pending.setdefault((stored, record['markup_key']), index)
+            return list(pending.values())
+    
+    def export_bytes(self, index, profile):
+        """(data, content_type, ext, codec) of a shot for profile, None if not encoded yet"""
+        with self._lock:
+            record = self._shots[index]
+            export = record['stored'].exports.get(record['markup_key'])
+            if export is None or export[0] != profile:
+                return None
+            return export[1:]
+    
+    def set_export(self, index, profile, result, key=None):
+        """
+        Attach export bytes encoded for profile to a shot. key is the markup
+        key the bytes were rendered with; they are dropped if the shot's
+        markups changed in the meantime.
+        """
+        with self._lock:
+            record = self._shots[index]
+            if key is not None and key != record['markup_key']:
+                return
+            exports = record['stored'].exports
+            if record['markup_key'] in exports:
+                self.memory_used -= len(exports[record['markup_key']][1])
+            exports[record['markup_key']] = (profile,) + tuple(result)
+            self.memory_used += len(exports[record['markup_key']][1])
+    
+    def pending_encodes(self):
+        """Indexes of shots that only exist as decoded images so far (one per shared image)"""
+        with self._lock:
+            pending = {}
+            for index, record in enumerate(self._shots):
+                stored = record['stored']
+                if stored.data is None and stored.path is None:
+                    pending.setdefault(stored, index)
+            return list(pending.values())
+    
+    def set_encoded(self, index, data):
+        """Attach PNG bytes encoded elsewhere to a shot"""
+        with self._lock:
+            stored = self._shots[index]['stored']
+            if stored.data is not None or stored.path is not None:
+                return
+            stored.data = data
+            self.memory_used += len(data)
+            self._enforce_budget()
+    
+    def close(self):
+        """Drop all shots and delete the session directory"""
+        with self._lock:
+            self._shots = []
+            self._hot.clear()
+            self._by_digest.clear()
+            self.memory_used = 0
+            if self.session_dir and os.path.isdir(self.session_dir):
+                shutil.rmtree(self.session_dir, ignore_errors=True)
+    
+    @classmethod
+    def remove_stale_sessions(cls):
+        """
+        Delete spill directories whose SnipIT process is gone, left behind by
+        a crash. Resuming reads the journal, never these files.
+        """
+        if not os.path.isdir(cls.SESSIONS_DIR):
+            return
+        for name in os.listdir(cls.SESSIONS_DIR):
+            # <date>_<time>_<pid>; directories without an owner are from older versions
+            parts = name.split("_")
+            if len(parts) == 3 and parts[2].isdigit() and process_running(int(parts[2])):
+                continue
+            shutil.rmtree(os.path.join(cls.SESSIONS_DIR, name), ignore_errors=True)
+            print(f"✓ Removed stale session data {name}")
+    
+    def _record(self, shot):
+        record = dict(shot)
+        record['markups'] = list(record.get('markups') or [])
+        record['markup_key'] = markup_key(record['markups'])
+        return record
+    
+    def _demote(self, stored):
+        """Move a hot image to the warm tier (PNG bytes in memory)"""
+        del self._hot[stored]
+        if stored.frame is None and stored.data is None and stored.path is None:
+            stored.data = png_bytes(stored.image)
+            self.memory_used += len(stored.data)
+        stored.image = None
+        self.memory_used -= stored.decoded_bytes()
+    
+    def _spill(self, stored):
+        """Move warm PNG bytes to the cold tier (a file in the session directory)"""
+        path = self._spill_path("png")
+        with open(path, "wb") as f:
+            f.write(stored.data)
+        stored.path = path
+        self.memory_used -= len(stored.data)
+        stored.data = None
+    
+    def _spill_frame(self, frame):
+        """Move the tiles of a delta frame to a file in the session directory"""
+        path = self._spill_path("delta")
+        with open(path, "wb") as f:
+            f.write(frame.blob)
+        frame.path = path
+        self.memory_used -= len(frame.blob)
+        frame.blob = None
+    
+    def _spill_path(self, ext):
+        if not self.session_dir:
+            # The process id in the name tells remove_stale_sessions() who owns it
+            self.session_dir = os.path.join(
+                self.SESSIONS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+        os.makedirs(self.session_dir, exist_ok=True)
+        
+        self._spilled += 1
+        return os.path.join(self.session_dir, f"shot_{self._spilled:04d}.{ext}")
+    
+    def _enforce_budget(self, keep=None):
+        """Demote and spill the oldest images until the store fits its budget"""
+        while len(self._hot) > self.hot_images:
+            oldest = next(iter(self._hot))
+            if oldest is keep:
+                self._hot.move_to_end(oldest)
+                oldest = next(iter(self._hot))
+            self._demote(oldest)
+        
+        for record in self._shots:
+            if self.memory_used <= self.memory_budget:
+                break
+            stored = record['stored']
+            if stored.image is not None and stored is not keep:
+                self._demote(stored)
+            if stored.data is not None:
+                self._spill(stored)
+            elif stored.frame is not None and stored.frame.blob is not None:
+                self._spill_frame(stored.frame)
+
+
+class BackgroundEncoder:
+    """
+    Encodes new screenshots to PNG on a background thread as they are captured,
+    along with their bytes for the configured export profile.
+    
+    The queue is bounded: when a burst of captures fills it, further shots are
+    simply left decoded and get encoded by the export process pool instead.
+    """
+    
+    def __init__(self, store, queue_size=8, export_profile="archival"):
+        self.store = store
+        self.export_profile = export_profile
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def submit(self, index):
+        """Queue a shot for encoding, returns False if the queue is full"""
+        try:
+            self._queue.put_nowait(index)
+            return True
+        except queue.Full:
+            print(f"✗ Encoder queue full - screenshot {index + 1} will be encoded on export")
+            return False
+    
+    def drain(self):
+        """Drop queued work, the export encodes whatever is still pending"""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+    
+    def _run(self):
+        while True:
+            index = self._queue.get()
+            try:
+                image = self.store.hot_image(index)
+                if image is None:
+                    continue
+                if self.store.needs_png(index):
+                    self.store.set_encoded(index, png_bytes(image))
+                if (EXPORT_PROFILES[self.export_profile]["dpi"] is not None
+                        and self.store.export_bytes(index, self.export_profile) is None):
+                    markups = self.store.markups(index)
+                    self.store.set_export(index, self.export_profile,
+                                          encode_for_export(image, self.export_profile, markups),
+                                          markup_key(markups))
+            except Exception as e:
+                print(f"✗ Background encoding failed for screenshot {index + 1}: {e}")
+
+
+def parse_hotkey(combo):
+    """Parse "ctrl+alt+f" into (modifiers, virtual key code)"""
+    modifiers = 0
+    vk = None
+    for part in combo.lower().replace(" ", "").split("+"):
+        if part in HOTKEY_MODIFIERS:
+            modifiers |= HOTKEY_MODIFIERS[part]
+        elif len(part) == 1 and part.isalnum():
+            vk = ord(part.upper())
+        elif part in NAMED_KEYS:
+            vk = NAMED_KEYS[part]
+        elif part[:1] == "f" and part[1:].isdigit() and 1 <= int(part[1:]) <= 24:
+            vk = 0x70 + int(part[1:]) - 1
+        else:
+            raise ValueError(f"Unknown key '{part}' in hotkey '{combo}'")
+    if vk is None:
+        raise ValueError(f"Hotkey '{combo}' has no key")
+    return modifiers, vk
+
+
+class HotkeyBackend:
+    """
+    Source of global hotkey presses.
+    
+    start() registers the bindings (name -> (modifiers, vk)) and calls
+    on_hotkey(name, pressed_at) from the backend's own thread for every
+    press, with pressed_at on the time.perf_counter() clock.
+    """
+    
+    def start(self, bindings, on_hotkey):
+        raise NotImplementedError
+    
+    def stop(self):
+        pass
+
+
+class Win32HotkeyBackend(HotkeyBackend):
+    """Hotkeys registered with RegisterHotKey and delivered as WM_HOTKEY messages"""
+    
+    WM_HOTKEY = 0x0312
+    WM_QUIT = 0x0012
+    
+    def __init__(self):
+        self._thread = None
+        self._thread_id = None
+    
+    def start(self, bindings, on_hotkey):
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(bindings, on_hotkey, ready), daemon=True)
+        self._thread.start()
+        ready.wait(2)
+    
+    def stop(self):
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+    
+    def _run(self, bindings, on_hotkey, ready):
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        self._thread_id = kernel32.GetCurrentThreadId()
+        
+        # Hotkeys belong to the thread that registers them, so register here
+        names = {}
+        for hotkey_id, (name, (modifiers, vk)) in enumerate(bindings.items(), 1):
+            if user32.RegisterHotKey(None, hotkey_id, modifiers | MOD_NOREPEAT, vk):
+                names[hotkey_id] = name
+            else:
+                print(f"✗ Could not register hotkey for '{name}' (already in use?)")
+        ready.set()
+        
+        msg = wintypes.MSG()
+        try:
+            # GetMessageW blocks until Windows delivers a message - no polling
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == self.WM_HOTKEY and msg.wParam in names:
+                    # msg.time is the GetTickCount() of the key press
+                    age = (kernel32.GetTickCount() - msg.time) & 0xFFFFFFFF
+                    on_hotkey(names[msg.wParam], time.perf_counter() - age / 1000)
+        finally:
+            for hotkey_id in names:
+                user32.UnregisterHotKey(None, hotkey_id)
+
+
+class FakeHotkeyBackend(HotkeyBackend):
+    """In-process backend: press() injects a hotkey, for testing dispatch without Windows"""
+    
+    def __init__(self):
+        self.bindings = {}
+        self._on_hotkey = None
+    
+    def start(self, bindings, on_hotkey):
+        self.bindings = dict(bindings)
+        self._on_hotkey = on_hotkey
+    
+    def stop(self):
+        self._on_hotkey = None
+    
+    def press(self, name, pressed_at=None):
+        if self._on_hotkey and name in self.bindings:
+            self._on_hotkey(name, time.perf_counter() if pressed_at is None else pressed_at)
+
+
+class HotkeyManager:
+    """
+    Maps configured key combinations to actions and dispatches them.
+    
+    Presses arrive on the backend thread and are handed to dispatch(), which
+    for the app schedules the action on the Tk thread. Actions are called
+    with the perf_counter() time of the key press. The time from key press
+    to the action actually running is recorded per action.
+    """
+    
+    def __init__(self, backend, combos, dispatch):
+        self.backend = backend
+        self.combos = dict(combos)
+        self.dispatch = dispatch
+        self.actions = {}
+        self.latencies = {}
+    
+    def bind(self, name, action):
+        self.actions[name] = action
+        self.latencies.setdefault(name, deque(maxlen=200))
+    
+    def start(self):
+        """Register every bound action that has a valid key combination"""
+        bindings = {}
+        for name in self.actions:
+            combo = self.combos.get(name)
+            if not combo:
+                continue
+            try:
+                bindings[name] = parse_hotkey(combo)
+            except ValueError as e:
+                print(f"✗ {e}")
+        self.backend.start(bindings, self._on_hotkey)
+        return bindings
+    
+    def stop(self):
+        self.backend.stop()
+    
+    def _on_hotkey(self, name, pressed_at):
+        self.dispatch(lambda: self._run(name, pressed_at))
+    
+    def _run(self, name, pressed_at):
+        latency = time.perf_counter() - pressed_at
+        self.latencies[name].append(latency)
+        print(f"✓ {self.combos[name].title()} detected ({latency * 1000:.0f} ms)")
+        self.actions[name](pressed_at)
+    
+    def latency_summary(self):
+        """Per action: (presses, mean, max) press-to-dispatch latency in seconds"""
+        return {name: (len(values), sum(values) / len(values), max(values))
+                for name, values in self.latencies.items() if values}
+
+
+DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE = -3
+
+
+@contextmanager
+def physical_pixels():
+    """Run Win32 screen calls on this thread in physical pixels, whatever the process DPI awareness"""
+    user32 = ctypes.windll.user32
+    previous = None
+    if hasattr(user32, "SetThreadDpiAwarenessContext"):
+        user32.SetThreadDpiAwarenessContext.restype = ctypes.c_void_p
+        previous = user32.SetThreadDpiAwarenessContext(
+            ctypes.c_void_p(DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE))
+    try:
+        yield
+    finally:
+        if previous:
+            user32.SetThreadDpiAwarenessContext(ctypes.c_void_p(previous))
+
+
+class MonitorTable:
+    """
+    Cached geometry of the attached monitors, in virtual-desktop pixels.
+    
+    EnumDisplayMonitors only runs again when the display configuration
+    signature - monitor count and virtual-desktop rectangle - changes, so a
+    lookup normally costs a few GetSystemMetrics calls. Monitors are
+    numbered left to right (then top to bottom) from 1.
+    """
+    
+    SM_XVIRTUALSCREEN = 76
+    SM_YVIRTUALSCREEN = 77
+    SM_CXVIRTUALSCREEN = 78
+    SM_CYVIRTUALSCREEN = 79
+    SM_CMONITORS = 80
+    MONITORINFOF_PRIMARY = 0x1
+    
+    class MONITORINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.DWORD), ("rcMonitor", wintypes.RECT),
+                    ("rcWork", wintypes.RECT), ("dwFlags", wintypes.DWORD)]
+    
+    def __init__(self):
+        self.refreshes = 0
+        self._signature = None
+        self._monitors = []  # (left, top, right, bottom), numbered order
+        self._primary = None
+        self._lock = threading.Lock()
+    
+    def monitors(self):
+        """Monitor rectangles, re-enumerated if the display configuration changed"""
+        with self._lock:
+            signature = self._read_signature()
+            if signature != self._signature:
+                self._monitors, self._primary = self._enumerate()
+                self._signature = signature
+                self.refreshes += 1
+            return list(self._monitors)
+    
+    def virtual_screen(self):
+        left, top, width, height = self._read_signature()[1:]
+        return (left, top, left + width, top + height)
+    
+    def primary(self):
+        self.monitors()
+        return self._primary
+    
+    def monitor_at(self, x, y):
+        """The monitor containing point (x, y), else the primary monitor"""
+        for left, top, right, bottom in self.monitors():
+            if left <= x < right and top <= y < bottom:
+                return (left, top, right, bottom)
+        return self.primary()
+    
+    def cursor_monitor(self):
+        point = wintypes.POINT()
+        with physical_pixels():
+            ctypes.windll.user32.GetCursorPos(ctypes.byref(point))
+        return self.monitor_at(point.x, point.y)
+    
+    def capture_bbox(self, mode):
+        """bbox for a capture_monitor setting: "current", "all", "primary" or a monitor number"""
+        if mode == "all":
+            return self.virtual_screen()
+        if mode == "primary":
+            return self.primary()
+        if isinstance(mode, int) and not isinstance(mode, bool):
+            monitors = self.monitors()
+            if 1 <= mode <= len(monitors):
+                return monitors[mode - 1]
+            print(f"✗ Monitor {mode} not found ({len(monitors)} attached), using the current one")
+        return self.cursor_monitor()
+    
+    def clamp(self, bbox):
+        """Clip bbox to the monitor under its centre"""
+        left, top, right, bottom = bbox
+        monitor = self.monitor_at((left + right) // 2, (top + bottom) // 2)
+        return (max(left, monitor[0]), max(top, monitor[1]),
+                min(right, monitor[2]), min(bottom, monitor[3]))
+    
+    def _read_signature(self):
+        user32 = ctypes.windll.user32
+        with physical_pixels():
+            return (user32.GetSystemMetrics(self.SM_CMONITORS),
+                    user32.GetSystemMetrics(self.SM_XVIRTUALSCREEN),
+                    user32.GetSystemMetrics(self.SM_YVIRTUALSCREEN),
+                    user32.GetSystemMetrics(self.SM_CXVIRTUALSCREEN),
+                    user32.GetSystemMetrics(self.SM_CYVIRTUALSCREEN))
+    
+    def _enumerate(self):
+        user32 = ctypes.windll.user32
+        monitors = []
+        primary = None
+        
+        def on_monitor(hmonitor, hdc, rect, data):
+            nonlocal primary
+            info = self.MONITORINFO()
+            info.cbSize = ctypes.sizeof(info)
+            if user32.GetMonitorInfoW(hmonitor, ctypes.byref(info)):
+                bounds = info.rcMonitor
+                monitor = (bounds.left, bounds.top, bounds.right, bounds.bottom)
+                monitors.append(monitor)
+                if info.dwFlags & self.MONITORINFOF_PRIMARY:
+                    primary = monitor
+            return True
+        
+        callback_type = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HMONITOR, wintypes.HDC,
+                                           ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+        with physical_pixels():
+            user32.EnumDisplayMonitors(None, None, callback_type(on_monitor), 0)
+        
+        monitors.sort()
+        if primary is None and monitors:
+            primary = monitors[0]
+        print(f"✓ Display configuration: {len(monitors)} monitor(s) {monitors}")
+        return monitors, primary
+
+
+class ForegroundWindowTracker:
+    """
+    Cached rectangle of the foreground window for the window capture.
+    
+    A WinEvent hook thread drops the cached rectangle whenever the foreground
+    window changes or a window finishes moving, resizing or restoring, so a
+    lookup is normally GetForegroundWindow plus a dictionary read. The
+    rectangle is the visible frame from DWM, without the invisible resize
+    borders GetWindowRect includes.
+    """
+    
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_SYSTEM_MOVESIZEEND = 0x000B
+    EVENT_SYSTEM_MINIMIZEEND = 0x0017
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WM_QUIT = 0x0012
+    DWMWA_EXTENDED_FRAME_BOUNDS = 9
+    
+    def __init__(self):
+        self.lookups = 0
+        self.hits = 0
+        self._cache = None  # (hwnd, maximized, rect)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_id = None
+    
+    def start(self):
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait(2)
+    
+    def stop(self):
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+    
+    def invalidate(self):
+        with self._lock:
+            self._cache = None
+    
+    def foreground(self):
+        """(hwnd, (left, top, right, bottom)) of the foreground window, None if there is none"""
+        user32 = ctypes.windll.user32
+        hwnd = user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+        # Maximizing fires no move/size-end event, so it is part of the key
+        maximized = bool(user32.IsZoomed(hwnd))
+        with self._lock:
+            self.lookups += 1
+            if self._cache and self._cache[:2] == (hwnd, maximized):
+                self.hits += 1
+                return hwnd, self._cache[2]
+        
+        rect = self._window_rect(hwnd)
+        with self._lock:
+            self._cache = (hwnd, maximized, rect)
+        return hwnd, rect
+    
+    def _window_rect(self, hwnd):
+        rect = wintypes.RECT()
+        with physical_pixels():
+            try:
+                found = ctypes.windll.dwmapi.DwmGetWindowAttribute(
+                    hwnd, self.DWMWA_EXTENDED_FRAME_BOUNDS, ctypes.byref(rect), ctypes.sizeof(rect)) == 0
+            except Exception:
+                found = False
+            if not found:
+                ctypes.windll.user32.GetWindowRect(hwnd, ctypes.byref(rect))
+        return (rect.left, rect.top, rect.right, rect.bottom)
+    
+    def _run(self, ready):
+        user32 = ctypes.windll.user32
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        
+        # Out-of-context hooks are delivered through this thread's message loop
+        callback_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                           wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        callback = callback_type(lambda *args: self.invalidate())
+        user32.SetWinEventHook.restype = ctypes.c_void_p
+        hooks = [user32.SetWinEventHook(event, event, None, callback, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+                 for event in (self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_MOVESIZEEND,
+                               self.EVENT_SYSTEM_MINIMIZEEND)]
+        ready.set()
+        
+        msg = wintypes.MSG()
+        try:
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(ctypes.c_void_p(hook))
+
+
+class CaptureBackend:
+    """
+    Grabs screen pixels as a PIL image.
+    
+    bbox is (left, top, right, bottom) in screen coordinates, None grabs the
+    whole primary screen. Every grab is timed so backends can be compared.
+    """
+    
+    name = "base"
+    
+    def __init__(self):
+        self.grabs = 0
+        self.grab_time = 0.0
+        self.pixels = 0
+    
+    def grab(self, bbox=None):
+        start = time.perf_counter()
+        image = self._grab(bbox)
+        self.grab_time += time.perf_counter() - start
+        self.grabs += 1
+        self.pixels += image.width * image.height
+        return image
+    
+    def _grab(self, bbox):
+        raise NotImplementedError
+    
+    def stats(self):
+        """(grabs, mean latency in seconds, grabs per second, megapixels per second)"""
+        if not self.grabs or not self.grab_time:
+            return self.grabs, 0.0, 0.0, 0.0
+        return (self.grabs, self.grab_time / self.grabs, self.grabs / self.grab_time,
+                self.pixels / self.grab_time / 1e6)
+    
+    def close(self):
+        pass
+
+
+class ImageGrabBackend(CaptureBackend):
+    """
+    PIL.ImageGrab - sets up a new device context and bitmap on every grab.
+    
+    ImageGrab only reaches other monitors by grabbing the whole virtual
+    desktop and cropping it, so bboxes off the primary monitor are grabbed
+    with GDI instead, which copies just the bbox.
+    """
+    
+    name = "imagegrab"
+    
+    def __init__(self):
+        super().__init__()
+        self._gdi = None
+    
+    def _grab(self, bbox):
+        with physical_pixels():
+            user32 = ctypes.windll.user32
+            primary = (0, 0, user32.GetSystemMetrics(0), user32.GetSystemMetrics(1))
+        on_primary = bbox is None or (bbox[0] >= primary[0] and bbox[1] >= primary[1]
+                                      and bbox[2] <= primary[2] and bbox[3] <= primary[3])
+        if on_primary:
+            return ImageGrab.grab(bbox=bbox)
+        if self._gdi is None:
+            self._gdi = GdiCaptureBackend()
+        return self._gdi._grab(bbox)
+    
+    def close(self):
+        if self._gdi is not None:
+            self._gdi.close()
+            self._gdi = None
+
+
+class GdiCaptureBackend(CaptureBackend):
+    """
+    BitBlt into a DIB section that is kept between grabs.
+    
+    The screen DC, memory DC and 32-bit DIB section are only recreated when
+    the grab size changes, so repeated grabs skip all GDI setup.
+    """
+    
+    name = "gdi"
+    
+    SRCCOPY = 0x00CC0020
+    CAPTUREBLT = 0x40000000
+    
+    class BITMAPINFOHEADER(ctypes.Structure):
+        _fields_ = [("biSize", wintypes.DWORD), ("biWidth", wintypes.LONG),
+                    ("biHeight", wintypes.LONG), ("biPlanes", wintypes.WORD),
+                    ("biBitCount", wintypes.WORD), ("biCompression", wintypes.DWORD),
+                    ("biSizeImage", wintypes.DWORD), ("biXPelsPerMeter", wintypes.LONG),
+                    ("biYPelsPerMeter", wintypes.LONG), ("biClrUsed", wintypes.DWORD),
+                    ("biClrImportant", wintypes.DWORD)]
+    
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._screen_dc = None
+        self._memory_dc = None
+        self._bitmap = None
+        self._old_bitmap = None
+        self._bits = None
+        self._size = None
+    
+    def _grab(self, bbox):
+        user32 = ctypes.windll.user32
+        gdi32 = ctypes.windll.gdi32
+        # Physical pixels, like ImageGrab, whatever the process DPI awareness
+        with self._lock, physical_pixels():
+            if bbox is None:
+                bbox = (0, 0, user32.GetSystemMetrics(0), user32.GetSystemMetrics(1))
+            left, top, right, bottom = bbox
+            size = (right - left, bottom - top)
+            if size != self._size:
+                self._allocate(size)
+            
+            gdi32.BitBlt(self._memory_dc, 0, 0, size[0], size[1], self._screen_dc,
+                         left, top, self.SRCCOPY | self.CAPTUREBLT)
+            buffer = (ctypes.c_ubyte * (size[0] * size[1] * 4)).from_address(self._bits.value)
+            # Converting BGRX to RGB copies the pixels out of the shared buffer
+            return Image.frombuffer("RGB", size, buffer, "raw", "BGRX", 0, 1)
+    
+    def _allocate(self, size):
+        user32 = ctypes.windll.user32
+        gdi32 = ctypes.windll.gdi32
+        self._release()
+        
+        header = self.BITMAPINFOHEADER()
+        header.biSize = ctypes.sizeof(header)
+        header.biWidth = size[0]
+        header.biHeight = -size[1]  # top-down rows
+        header.biPlanes = 1
+        header.biBitCount = 32
+        
+        gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+        self._screen_dc = user32.GetDC(None)
+        self._memory_dc = gdi32.CreateCompatibleDC(self._screen_dc)
+        self._bits = ctypes.c_void_p()
+        self._bitmap = gdi32.CreateDIBSection(self._memory_dc, ctypes.byref(header), 0,
+                                              ctypes.byref(self._bits), None, 0)
+        if not self._bitmap:
+            raise OSError("CreateDIBSection failed")
+        self._old_bitmap = gdi32.SelectObject(self._memory_dc, self._bitmap)
+        self._size = size
+    
+    def _release(self):
+        user32 = ctypes.windll.user32
+        gdi32 = ctypes.windll.gdi32
+        if self._memory_dc:
+            gdi32.SelectObject(self._memory_dc, self._old_bitmap)
+            gdi32.DeleteObject(self._bitmap)
+            gdi32.DeleteDC(self._memory_dc)
+        if self._screen_dc:
+            user32.ReleaseDC(None, self._screen_dc)
+        self._screen_dc = self._memory_dc = self._bitmap = self._old_bitmap = None
+        self._size = None
+    
+    def close(self):
+        with self._lock:
+            self._release()
+
+
+class SyntheticCaptureBackend(CaptureBackend):
+    """
+    Generates desktop-like frames for headless tests and benchmarks.
+    
+    Frames are deterministic: a static desktop with a few windows, plus a
+    small dialog that moves and a counter that changes on every grab, so
+    consecutive frames differ only in a small area like real captures.
+    """
+    
+    name = "synthetic"
+    
+    def __init__(self, size=(1920, 1080)):
+        super().__init__()
+        self.size = tuple(size)
+        self._desktop = self._draw_desktop()
+    
+    def _draw_desktop(self):
+        width, height = self.size
+        desktop = Image.new("RGB", self.size, "#1E3A5F")
+        draw = ImageDraw.Draw(desktop)
+        for i, color in enumerate(("#FFFFFF", "#F0F0F0", "#FAFAFA")):
+            left, top = 60 + i * width // 4, 60 + i * 40
+            draw.rectangle([left, top, left + width // 3, top + height // 2], fill=color, outline="#999999")
+            draw.rectangle([left, top, left + width // 3, top + 24], fill="#2196F3")
+            for line in range(top + 40, top + height // 2 - 20, 18):
+                draw.text((left + 12, line), f"Row {line} - sample text", fill="#333333")
+        draw.rectangle([0, height - 40, width, height], fill="#202020")
+        return desktop
+    
+    def _grab(self, bbox):
+        frame = self._desktop.copy()
+        draw = ImageDraw.Draw(frame)
+        width, height = self.size
+        left = 100 + (self.grabs * 37) % max(1, width - 400)
+        top = height // 3
+        draw.rectangle([left, top, left + 300, top + 120], fill="#FFFFFF", outline="#1976D2", width=2)
+        draw.text((left + 20, top + 50), f"Frame {self.grabs}", fill="#000000")
+        # A taskbar clock that ticks once per grab, not with the wall clock
+        clock = f"{self.grabs // 3600 % 24:02d}:{self.grabs // 60 % 60:02d}:{self.grabs % 60:02d}"
+        draw.text((width - 120, height - 28), clock, fill="#FFFFFF")
+        return frame.crop(bbox) if bbox else frame
+
+
+CAPTURE_BACKENDS = {
+    backend.name: backend for backend in (ImageGrabBackend, GdiCaptureBackend, SyntheticCaptureBackend)
+}
+
+
+def create_capture_backend(name):
+    """Create the capture backend called name, falling back to ImageGrab"""
+    backend = CAPTURE_BACKENDS.get(name)
+    if backend is None:
+        print(f"✗ Unknown capture backend '{name}', using 'imagegrab'")
+        backend = ImageGrabBackend
+    return backend()
+
+
+def display_refresh_interval_ms():
+    """Milliseconds per frame of the primary display (16 if it can't be read)"""
+    VREFRESH = 116
+    try:
+        hdc = ctypes.windll.user32.GetDC(None)
+        try:
+            hz = ctypes.windll.gdi32.GetDeviceCaps(hdc, VREFRESH)
+        finally:
+            ctypes.windll.user32.ReleaseDC(None, hdc)
+        if hz > 1:
+            return max(4, int(1000 / hz))
+    except Exception:
+        pass
+    return 16
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Ramer-Douglas-Peucker decimation: drop points that lie within tolerance of
+    the simplified line, keeping the first and last point.
+    """
+    if len(points) < 3:
+        return list(points)
+    
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = (dx * dx + dy * dy) ** 0.5
+        
+        farthest, max_distance = None, tolerance
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length:
+                distance = abs(dy * px - dx * py + x2 * y1 - y2 * x1) / length
+            else:
+                distance = ((px - x1) ** 2 + (py - y1) ** 2) ** 0.5
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class TiledImageView:
+    """
+    Pan and zoom view of a (possibly very large) image on a Tk canvas.
+    
+    A resolution pyramid - each level half the size of the one before - is
+    built lazily on a background thread. Only the tiles that intersect the
+    visible area are rendered, from the pyramid level closest to the zoom,
+    and rendered tiles are kept in an LRU cache. to_image() and to_canvas()
+    map between canvas and original image pixel coordinates.
+    """
+    
+    TILE = 256
+    MAX_ZOOM = 8.0
+    
+    def __init__(self, canvas, image, zoom, cache_tiles=192, on_change=None):
+        self.canvas = canvas
+        self.image = image
+        self.zoom = zoom
+        self.fit_zoom = zoom
+        self.offset_x = 0.0  # canvas position of the image's top-left corner
+        self.offset_y = 0.0
+        self.on_change = on_change
+        self.cache_tiles = cache_tiles
+        
+        self._levels = [image]
+        self._pyramid_done = False
+        self._cache = OrderedDict()  # (level, zoom, column, row) -> PhotoImage
+        self._shown = {}             # same key -> (canvas item, PhotoImage)
+        self._render_pending = False
+        threading.Thread(target=self._build_pyramid, daemon=True).start()
+    
+    def to_image(self, x, y):
+        """Canvas coordinates to original image pixel coordinates"""
+        return (x - self.offset_x) / self.zoom, (y - self.offset_y) / self.zoom
+    
+    def to_canvas(self, x, y):
+        """Original image pixel coordinates to canvas coordinates"""
+        return x * self.zoom + self.offset_x, y * self.zoom + self.offset_y
+    
+    def zoom_at(self, factor, x, y):
+        """Zoom by factor keeping the image point under canvas (x, y) in place"""
+        zoom = min(self.MAX_ZOOM, max(self.fit_zoom / 2, self.zoom * factor))
+        image_x, image_y = self.to_image(x, y)
+        self.zoom = zoom
+        self.offset_x = x - image_x * zoom
+        self.offset_y = y - image_y * zoom
+        self.render()
+    
+    def pan(self, dx, dy):
+        self.offset_x += dx
+        self.offset_y += dy
+        self.render()
+    
+    def fit(self):
+        self.zoom = self.fit_zoom
+        self.offset_x = self.offset_y = 0.0
+        self.render()
+    
+    def render(self):
+        """Show the tiles covering the visible part of the canvas"""
+        self._render_pending = False
+        wanted = 0
+        while 2 ** (wanted + 1) <= 1 / self.zoom:
+            wanted += 1
+        level = min(wanted, len(self._levels) - 1)
+        source = self._levels[level]
+        scale = self.zoom * 2 ** level  # canvas pixels per pixel of this level
+        
+        view_width = self.canvas.winfo_width()
+        view_height = self.canvas.winfo_height()
+        tile = self.TILE
+        first_column = max(0, int(-self.offset_x / scale // tile))
+        first_row = max(0, int(-self.offset_y / scale // tile))
+        last_column = min((source.width - 1) // tile, int((view_width - self.offset_x) / scale // tile))
+        last_row = min((source.height - 1) // tile, int((view_height - self.offset_y) / scale // tile))
+        
+        visible = {}
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                key = (level, round(self.zoom, 6), column, row)
+                left = round(self.offset_x + column * tile * scale)
+                top = round(self.offset_y + row * tile * scale)
+                if key in self._shown:
+                    item, photo = self._shown.pop(key)
+                    self.canvas.coords(item, left, top)
+                else:
+                    photo = self._tile_photo(key, source, scale)
+                    item = self.canvas.create_image(left, top, image=photo, anchor="nw", tags="tile")
+                visible[key] = (item, photo)
+        
+        for item, photo in self._shown.values():
+            self.canvas.delete(item)
+        self._shown = visible
+        self.canvas.tag_lower("tile")
+        
+        # Re-render once the pyramid level for this zoom is ready
+        if level < wanted and not self._pyramid_done and not self._render_pending:
+            self._render_pending = True
+            self.canvas.after(50, self.render)
+        if self.on_change:
+            self.on_change()
+    
+    def _tile_photo(self, key, source, scale):
+        photo = self._cache.get(key)
+        if photo is not None:
+            self._cache.move_to_end(key)
+            return photo
+        
+        level, zoom, column, row = key
+        tile = self.TILE
+        box = (column * tile, row * tile,
+               min(source.width, (column + 1) * tile), min(source.height, (row + 1) * tile))
+        # Size from the rounded canvas edges so neighbouring tiles never leave a seam
+        width = round(self.offset_x + box[2] * scale) - round(self.offset_x + box[0] * scale)
+        height = round(self.offset_y + box[3] * scale) - round(self.offset_y + box[1] * scale)
+        region = source.crop(box)
+        if region.size != (width, height):
+            resample = Image.Resampling.NEAREST if scale >= 2 else Image.Resampling.BILINEAR
+            region = region.resize((max(1, width), max(1, height)), resample)
+        photo = ImageTk.PhotoImage(region)
+        
+        self._cache[key] = photo
+        while len(self._cache) > self.cache_tiles:
+            self._cache.popitem(last=False)
+        return photo
+    
+    def _build_pyramid(self):
+        level = self.image
+        while level.width > self.TILE or level.height > self.TILE:
+            level = level.reduce(2)
+            self._levels.append(level)
+        self._pyramid_done = True
+
+
+class RegionChangeWatcher:
+    """
+    Watches a screen region for the partial capture "change" trigger.
+    
+    A background thread grabs the region rate_hz times a second and boxes
+    each grab down to a small grayscale fingerprint. With a backend that
+    copies only the bbox (GdiCaptureBackend) a sample costs one BitBlt of the
+    region and a 32x32 reduction. The watcher reports once the
+    fingerprint has moved away from the first sample and then stayed put for
+    settle_ms, or once timeout_s has run out.
+    """
+    
+    LEVELS = 24  # grey levels a fingerprint cell must move to count as changed
+    
+    def __init__(self, backend, bbox, rate_hz=15, settle_ms=300, timeout_s=10,
+                 threshold=0.01, sample_size=32):
+        self.backend = backend
+        self.bbox = bbox
+        self.interval = 1 / max(1, rate_hz)
+        self.settle = settle_ms / 1000
+        self.timeout = timeout_s
+        self.threshold = threshold
+        self.sample_size = sample_size
+        self.samples = 0
+        self.sample_time = 0.0
+        self._cancel = threading.Event()
+    
+    def start(self, on_done):
+        """
+        Start watching. on_done(reason) is called from the watcher thread with
+        "changed", "timeout", "cancelled" or "error".
+        """
+        threading.Thread(target=self._run, args=(on_done,), daemon=True).start()
+    
+    def cancel(self):
+        self._cancel.set()
+    
+    def fingerprint(self, image):
+        small = image.resize((self.sample_size, self.sample_size), Image.Resampling.BOX).convert("L")
+        return np.asarray(small, dtype=np.int16)
+    
+    def differs(self, first, second):
+        """True if enough fingerprint cells moved by more than LEVELS"""
+        moved = np.count_nonzero(np.abs(first - second) > self.LEVELS)
+        return moved >= max(1, self.threshold * first.size)
+    
+    def _sample(self):
+        start = time.perf_counter()
+        fingerprint = self.fingerprint(self.backend.grab(self.bbox))
+        self.sample_time += time.perf_counter() - start
+        self.samples += 1
+        return fingerprint
+    
+    def _run(self, on_done):
+        reason = "cancelled"
+        try:
+            deadline = time.perf_counter() + self.timeout
+            baseline = previous = self._sample()
+            changed_at = None
+            next_sample = time.perf_counter() + self.interval
+            while not self._cancel.wait(max(0.0, next_sample - time.perf_counter())):
+                next_sample += self.interval
+                now = time.perf_counter()
+                if now >= deadline:
+                    reason = "timeout"
+                    break
+                
+                current = self._sample()
+                if changed_at is None:
+                    if self.differs(baseline, current):
+                        changed_at = now
+                elif self.differs(previous, current):
+                    # Still moving (menu animating open) - restart the settle time
+                    changed_at = now
+                elif now - changed_at >= self.settle:
+                    reason = "changed"
+                    break
+                previous = current
+        except Exception as e:
+            print(f"✗ Region watcher failed: {e}")
+            reason = "error"
+        finally:
+            self.backend.close()
+        on_done(reason)
+    
+    def summary(self):
+        if not self.samples:
+            return "no samples"
+        return (f"{self.samples} samples, "
+                f"{self.sample_time / self.samples * 1000:.1f} ms per sample")
+
+
+def frame_difference(previous, current, levels=16):
+    """Fraction of pixels that moved by more than levels in any channel (arrays from frame_sample)"""
+    if previous.shape != current.shape:
+        return 1.0
+    # Absolute difference without widening the uint8 arrays
+    moved = (np.maximum(previous, current) - np.minimum(previous, current)) > levels
+    if moved.ndim == 3:
+        moved = moved.any(axis=2)
+    return np.count_nonzero(moved) / moved.size
+
+
+def frame_sample(image, step=4):
+    """Every step-th pixel of an image as an array, enough to compare frames"""
+    size = (max(1, image.width // step), max(1, image.height // step))
+    return np.asarray(image.resize(size, Image.Resampling.NEAREST))
+
+
+class CaptureScheduler:
+    """
+    Grabs frames on a background thread, every interval seconds until
+    stopped or for count frames, and hands the ones that changed to on_frame.
+    
+    Each frame is compared with the last kept one by frame_difference on a
+    subsampled array; frames where less than threshold of the pixels moved
+    are dropped. Stops by itself once max_frames frames were kept.
+    on_frame(image, timestamp, timer) is called on the scheduler thread.
+    """
+    
+    def __init__(self, backend, on_frame, interval, count=None, bbox=None,
+                 threshold=0.005, max_frames=500):
+        self.backend = backend
+        self.on_frame = on_frame
+        self.interval = interval
+        self.count = count
+        self.bbox = bbox
+        self.threshold = threshold
+        self.max_frames = max_frames
+        self.grabbed = 0
+        self.kept = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self, timeout=None):
+        """Stop grabbing; with a timeout, wait for a frame in progress to be handed over"""
+        self._stop.set()
+        if timeout is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+    
+    def running(self):
+        return self._thread.is_alive() and not self._stop.is_set()
+    
+    def _run(self):
+        last_kept = None
+        next_grab = time.perf_counter()
+        try:
+            while not self._stop.wait(max(0.0, next_grab - time.perf_counter())):
+                next_grab += self.interval
+                timer = CaptureTimer()
+                image = self.backend.grab(self.bbox)
+                timestamp = datetime.now()
+                timer.mark("grabbed")
+                self.grabbed += 1
+                
+                sample = frame_sample(image)
+                if last_kept is None or frame_difference(last_kept, sample) > self.threshold:
+                    last_kept = sample
+                    self.kept += 1
+                    self.on_frame(image, timestamp, timer)
+                
+                if self.kept >= self.max_frames:
+                    print(f"✓ Scheduled capture reached its limit of {self.max_frames} frames")
+                    break
+                if self.count is not None and self.grabbed >= self.count:
+                    break
+        except Exception as e:
+            print(f"✗ Scheduled capture failed: {e}")
+        finally:
+            self.backend.close()
+            print(f"✓ Scheduled capture stopped: kept {self.kept} of {self.grabbed} frames")
+
+
+class ReplayBuffer:
+    """
+    The last seconds of screen frames, for instant replay.
+    
+    A background thread grabs a frame every 1 / fps seconds, skips it if its
+    pixels equal the previous frame, and keeps it PNG-encoded in a ring that
+    is trimmed to seconds of history and held strictly under budget_mb.
+    take() hands the encoded frames out as they are, so promoting them to
+    the session never re-encodes or copies them.
+    """
+    
+    def __init__(self, backend, seconds=30, fps=2, budget_mb=64, locate=None):
+        self.backend = backend
+        self.locate = locate  # returns the bbox to grab, None for the whole screen
+        self.seconds = seconds
+        self.interval = 1 / max(0.1, fps)
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.used = 0
+        self._frames = deque()  # (grabbed_at, timestamp, size, mode, digest, data)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def take(self):
+        """Remove and return all buffered frames, oldest first"""
+        with self._lock:
+            frames = list(self._frames)
+            self._frames.clear()
+            self.used = 0
+        return frames
+    
+    def _run(self):
+        last_digest = None
+        next_grab = time.perf_counter()
+        try:
+            while not self._stop.wait(max(0.0, next_grab - time.perf_counter())):
+                next_grab += self.interval
+                image = self.backend.grab(self.locate() if self.locate else None)
+                grabbed_at = time.perf_counter()
+                timestamp = datetime.now()
+                digest = image_digest(image)
+                if digest == last_digest:
+                    continue
+                last_digest = digest
+                self._add((grabbed_at, timestamp, image.size, image.mode, digest, png_bytes(image)))
+        except Exception as e:
+            print(f"✗ Instant replay stopped: {e}")
+        finally:
+            self.backend.close()
+    
+    def _add(self, frame):
+        data = frame[-1]
+        if len(data) > self.budget:
+            print("✗ Replay frame larger than replay_budget_mb, dropped")
+            return
+        with self._lock:
+            # Trim by age, then by bytes, before the new frame goes in
+            while self._frames and frame[0] - self._frames[0][0] > self.seconds:
+                self.used -= len(self._frames.popleft()[-1])
+            while self._frames and self.used + len(data) > self.budget:
+                self.used -= len(self._frames.popleft()[-1])
+            self._frames.append(frame)
+            self.used += len(data)
+
+
+class RegionPresets:
+    """
+    Named capture regions persisted in regions.json in SETTINGS_DIR.
+    
+    "last" is kept up to date with the most recent partial capture
+    selection; other names are saved from the toolbar's right-click menu.
+    """
+    
+    def __init__(self, path=None):
+        self.path = path or os.path.join(SETTINGS_DIR, "regions.json")
+        self.regions = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.regions = {name: tuple(bbox) for name, bbox in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"✗ Failed to load saved regions from {self.path}: {e}")
+    
+    def get(self, name):
+        return self.regions.get(name)
+    
+    def names(self):
+        return sorted(self.regions, key=lambda name: (name != "last", name.lower()))
+    
+    def save(self, name, bbox):
+        self.regions[name] = tuple(bbox)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({name: list(bbox) for name, bbox in self.regions.items()}, f, indent=2)
+        except Exception as e:
+            print(f"✗ Failed to save region '{name}': {e}")
+
+
+class CaptureRequestQueue:
+    """
+    Bounded queue of capture requests between the hotkeys and the capture
+    pipeline, so presses that arrive while a capture is running are carried
+    out afterwards, in order, instead of being lost.
+    
+    Requests are (name, pressed_at, action) with pressed_at on the
+    time.perf_counter() clock of the key press. Thread-safe.
+    """
+    
+    POLICIES = ("drop_newest", "drop_oldest", "coalesce")
+    
+    def __init__(self, depth=8, policy="drop_newest"):
+        if policy not in self.POLICIES:
+            print(f"✗ Unknown capture queue policy '{policy}', using 'drop_newest'")
+            policy = "drop_newest"
+        self.depth = max(1, int(depth))
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self._requests = deque()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._requests)
+    
+    def put(self, name, pressed_at, action):
+        """Queue a request, returns False if the policy dropped it"""
+        with self._lock:
+            if self.policy == "coalesce" and any(request[0] == name for request in self._requests):
+                self.coalesced += 1
+                return False
+            if len(self._requests) >= self.depth:
+                self.dropped += 1
+                if self.policy != "drop_oldest":
+                    print(f"✗ Capture queue full, '{name}' press dropped")
+                    return False
+                dropped = self._requests.popleft()
+                print(f"✗ Capture queue full, oldest '{dropped[0]}' request dropped")
+            self._requests.append((name, pressed_at, action))
+            return True
+    
+    def get(self):
+        """The oldest waiting request, None if there is none"""
+        with self._lock:
+            return self._requests.popleft() if self._requests else None
+
+
+class CaptureWorker:
+    """
+    Runs the slow part of captures - grabbing, hashing, storing - on its own thread.
+    
+    Jobs run one at a time in the order they were submitted, so shots are
+    stored in the order they were taken. Results go back through post(callback,
+    *args), which hands them to the Tk thread; only window hide/show and
+    dialogs stay there.
+    """
+    
+    def __init__(self, post):
+        self.post = post
+        self.jobs = 0
+        self.busy_time = 0.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def submit(self, work, on_done=None, on_error=None):
+        """Run work() on the worker, then on_done(result) or on_error(exception) on the Tk thread"""
+        self._queue.put((work, on_done, on_error))
+    
+    def pending(self):
+        """Jobs submitted and not finished yet"""
+        return self._queue.unfinished_tasks
+    
+    def drain(self, timeout=None):
+        """Wait until the jobs submitted so far have run"""
+        done = threading.Event()
+        self._queue.put((done.set, None, None))
+        return done.wait(timeout)
+    
+    def stop(self, timeout=None):
+        """Finish the queued jobs, then end the thread"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+    
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            work, on_done, on_error = job
+            start = time.perf_counter()
+            try:
+                result = work()
+            except Exception as e:
+                if on_error:
+                    self._post(on_error, e)
+                else:
+                    print(f"✗ Capture worker: {e}")
+                continue
+            finally:
+                self.busy_time += time.perf_counter() - start
+                self.jobs += 1
+                self._queue.task_done()
+            if on_done:
+                self._post(on_done, result)
+    
+    def _post(self, callback, *args):
+        try:
+            self.post(callback, *args)
+        except Exception as e:
+            # The UI is gone when jobs finish during shutdown
+            print(f"✗ Capture worker could not report back: {e}")
+
+
+class CaptureTimer:
+    """Records the phases of one capture (trigger, hidden, grabbed, stored) in seconds"""
+    
+    def __init__(self, triggered_at=None):
+        self.marks = {"trigger": time.perf_counter() if triggered_at is None else triggered_at}
+    
+    def mark(self, phase):
+        self.marks[phase] = time.perf_counter()
+    
+    def as_dict(self):
+        """Milliseconds from the trigger to each phase"""
+        start = self.marks["trigger"]
+        return {phase: round((at - start) * 1000, 1) for phase, at in self.marks.items()}
+    
+    def summary(self):
+        phases = list(self.marks.items())
+        steps = [f"{name} +{(at - prev) * 1000:.0f} ms"
+                 for (_, prev), (name, at) in zip(phases, phases[1:])]
+        total = (phases[-1][1] - phases[0][1]) * 1000
+        return f"{', '.join(steps)} (total {total:.0f} ms)"
+
+
+class SessionJournal:
+    """
+    Append-only journal of a session's captures, for resuming after a crash.
+    
+    Each record is framed as <length><crc32><payload>, where the payload is a
+    length-prefixed JSON header followed by the shot's PNG bytes; a record
+    torn by a crash fails its length or CRC check and ends the replay. The
+    PNG of an image that was already journaled is not written again. Records
+    are written by a background thread that fsyncs once per batch, so the
+    capture path only queues an index.
+    """
+    
+    FRAME = struct.Struct("<II")
+    META = struct.Struct("<I")
+    DIR = os.path.join(SETTINGS_DIR, "journal")
+    
+    def __init__(self, store, path=None, valid_length=None, digests=(), batch_ms=200):
+        if path is None:
+            os.makedirs(self.DIR, exist_ok=True)
+            path = os.path.join(self.DIR, f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.journal")
+        self.path = path
+        self.store = store
+        self.batch = batch_ms / 1000
+        self._digests = set(digests)  # images already in the journal
+        self._file = open(path, "ab")
+        if valid_length is not None:
+            # Drop a record torn by the crash before appending after it
+            self._file.truncate(valid_length)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def add(self, index):
+        """Journal shot index of the store (image, comment, timestamp, markups)"""
+        self._queue.put(("shot", index))
+    
+    def update_markups(self, index, markups):
+        self._queue.put(("markups", index, list(markups)))
+    
+    def close(self):
+        """Write what is queued and close the journal, keeping the file"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+    
+    def discard(self):
+        """Close and delete the journal once the session was exported"""
+        self.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+    
+    @classmethod
+    def unfinished(cls, exclude=None):
+        """Journals left behind by earlier sessions, newest first"""
+        if not os.path.isdir(cls.DIR):
+            return []
+        paths = [os.path.join(cls.DIR, name) for name in os.listdir(cls.DIR) if name.endswith(".journal")]
+        return sorted((path for path in paths if path != exclude), reverse=True)
+    
+    @classmethod
+    def read(cls, path):
+        """
+        Replay a journal: returns (shots, edits, valid_length). shots are
+        dicts with 'index', 'comment', 'timestamp', 'markups', 'size',
+        'mode', 'digest' and 'data' in index order, edits are
+        (position in shots, markups), and valid_length is where the intact
+        records end. Edits of shots that were never journaled are dropped.
+        """
+        with open(path, "rb") as f:
+            content = f.read()
+        
+        shots = []
+        edits = []
+        images = {}
+        offset = 0
+        while offset + cls.FRAME.size <= len(content):
+            length, crc = cls.FRAME.unpack_from(content, offset)
+            payload = content[offset + cls.FRAME.size:offset + cls.FRAME.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            offset += cls.FRAME.size + length
+            
+            meta_length, = cls.META.unpack_from(payload)
+            meta = json.loads(payload[cls.META.size:cls.META.size + meta_length])
+            if meta["type"] == "markups":
+                edits.append((meta["index"], meta["markups"]))
+                continue
+            data = payload[cls.META.size + meta_length:]
+            if data:
+                images[meta["digest"]] = data
+            if meta["digest"] not in images:
+                # The record with this image's PNG failed to write
+                continue
+            meta["data"] = images[meta["digest"]]
+            meta["timestamp"] = datetime.fromisoformat(meta["timestamp"])
+            meta["size"] = tuple(meta["size"])
+            shots.append(meta)
+        
+        shots.sort(key=lambda shot: shot["index"])
+        positions = {shot["index"]: position for position, shot in enumerate(shots)}
+        edits = [(positions[index], markups) for index, markups in edits if index in positions]
+        return shots, edits, offset
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.batch
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.perf_counter())))
+                except queue.Empty:
+                    break
+            
+            for item in batch:
+                if item is None:
+                    continue
+                try:
+                    self._file.write(self._frame(item))
+                except Exception as e:
+                    # Skip only this record, the rest of the batch is still written
+                    print(f"✗ Failed to journal {item[0]} of screenshot {item[1] + 1}: {e}")
+            try:
+                # One fsync for the whole batch
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                print(f"✗ Failed to write session journal: {e}")
+            
+            if batch[-1] is None:
+                self._file.close()
+                return
+    
+    def _frame(self, item):
+        if item[0] == "markups":
+            meta = {"type": "markups", "index": item[1], "markups": item[2]}
+            data = b""
+        else:
+            index = item[1]
+            shot = self.store[index]
+            stored = shot['stored']
+            meta = {
+                "type": "shot",
+                "index": index,
+                "comment": shot['comment'],
+                "timestamp": shot['timestamp'].isoformat(),
+                "markups": shot['markups'],
+                "size": list(stored.size),
+                "mode": stored.mode,
+                "digest": stored.digest,
+            }
+            data = b""
+            if stored.digest not in self._digests:
+                data = self.store.encoded(index)
+                # Keep the PNG so the background encoder need not make it again
+                if self.store.needs_png(index):
+                    self.store.set_encoded(index, data)
+                self._digests.add(stored.digest)
+        
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        payload = self.META.pack(len(meta_bytes)) + meta_bytes + data
+        return self.FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+class ExportCancelled(Exception):
+    """Raised on the export thread when the user cancels the export"""
+
+
+class CountingWriter:
+    """
+    File wrapper handed to doc.save(): counts the bytes written, reports them
+    to on_write(total) every report_every bytes, and aborts the save with
+    ExportCancelled once cancel is set.
+    """
+    
+    def __init__(self, file, cancel, on_write=None, report_every=256 * 1024):
+        self.file = file
+        self.cancel = cancel
+        self.on_write = on_write
+        self.report_every = report_every
+        self.written = 0
+        self._reported = 0
+    
+    def write(self, data):
+        if self.cancel.is_set():
+            raise ExportCancelled()
+        count = self.file.write(data)
+        self.written += len(data)
+        if self.on_write and self.written - self._reported >= self.report_every:
+            self._reported = self.written
+            self.on_write(self.written)
+        return count
+    
+    def __getattr__(self, name):
+        # seek(), tell(), flush() ... as the zip writer needs them
+        return getattr(self.file, name)
+
+
+class LazyImagePart(ImagePart):
+    """Image part whose bytes are only loaded while the .docx package is being written"""
+    
+    def __init__(self, partname, content_type, load_blob):
+        super().__init__(partname, content_type, None)
+        self._load_blob = load_blob
+    
+    @property
+    def blob(self):
+        return self._load_blob()
+
+
+class StreamingPictureWriter:
+    """
+    Adds pictures to a python-docx Document without holding their bytes.
+    
+    doc.add_picture() needs a file and keeps every image blob in the package
+    until doc.save(). Pictures added here only reference a loader, which is
+    called once per image while doc.save() streams the archive to disk, so
+    peak memory stays close to a single image.
+    """
+    
+    def __init__(self, doc):
+        self.doc = doc
+        self._count = 0
+        self._parts = {}  # key -> (rId, filename) of pictures already in the package
+    
+    def add_picture(self, load_blob, pixel_size, width, content_type="image/png", ext="png", key=None):
+        """
+        Add a picture of pixel_size scaled to width (EMU) in a new paragraph.
+        
+        Pictures added with the same key reference a single media part.
+        """
+        if key is not None and key in self._parts:
+            rId, filename = self._parts[key]
+        else:
+            self._count += 1
+            filename = f"image{self._count}.{ext}"
+            part = LazyImagePart(PackURI(f"/word/media/{filename}"), content_type, load_blob)
+            rId = self.doc.part.relate_to(part, RT.IMAGE)
+            if key is not None:
+                self._parts[key] = (rId, filename)
+        
+        img_width, img_height = pixel_size
+        cx = int(width)
+        cy = int(width * img_height / img_width) if img_width else cx
+        inline = CT_Inline.new_pic_inline(self.doc.part.next_id, rId, filename, cx, cy)
+        
+        run = self.doc.add_paragraph().add_run()
+        run._r.add_drawing(inline)
 
 
 class ScreenshotTool:
@@ -45,9 +2338,43 @@ class ScreenshotTool:
         ctypes.windll.user32.SetWindowLongW(hwnd, -20, 0x00000008 | 0x00000080 | 0x00000020 | 0x00040000)
         
         # Initialize data storage
-        self.screenshots = []
+        self.settings = load_settings()
+        SessionStore.remove_stale_sessions()
+        if self.settings["export_profile"] not in EXPORT_PROFILES:
+            print(f"✗ Unknown export profile '{self.settings['export_profile']}', using 'standard'")
+            self.settings["export_profile"] = "standard"
+        self.screenshots = SessionStore(hot_images=self.settings["hot_images"],
+                                        memory_budget_mb=self.settings["memory_budget_mb"],
+                                        storage_mode=self.settings["storage_mode"],
+                                        tile_size=self.settings["tile_size"],
+                                        keyframe_interval=self.settings["keyframe_interval"])
+        self.encoder = BackgroundEncoder(self.screenshots, self.settings["encode_queue_size"],
+                                         self.settings["export_profile"])
+        self.capture_requests = CaptureRequestQueue(self.settings["capture_queue_size"],
+                                                    self.settings["capture_queue_policy"])
+        self.export_cancel = None
+        self.export_thread = None
+        self.markup_windows = []
+        
+        # Offer to resume a session that crashed or was closed before End,
+        # then keep journaling captures into it (or a new journal)
+        self.journal = None
+        if self.settings["journal"]:
+            self.journal = self.resume_session() or SessionJournal(
+                self.screenshots, batch_ms=self.settings["journal_batch_ms"])
         self.is_capturing = False
         self.add_comment_var = tk.BooleanVar(value=False)
+        self.hotkeys = None
+        self.capture_timings = deque(maxlen=500)
+        self.capture = create_capture_backend(self.settings["capture_backend"])
+        # Grabs and stores run on the capture worker, results come back through Tk
+        self.capture_worker = CaptureWorker(lambda callback, *args: self.root.after(0, callback, *args))
+        self.monitors = MonitorTable()
+        self.regions = RegionPresets()
+        self.windows = ForegroundWindowTracker()
+        self.windows.start()
+        self.scheduler = None
+        self.replay = None
         self.partial_screenshot_mode = False
         self.markup_mode = False
         self.select_window = None
@@ -57,62 +2384,67 @@ class ScreenshotTool:
         self.setup_ui()
         self.center_window()
         
+        # Keep the last seconds of frames for the replay hotkey
+        if self.settings["replay_seconds"] > 0:
+            self.start_replay()
+        
         # Register global hotkeys (like Windows Snipping Tool)
         self.register_hotkeys()
         
+    @property
+    def is_capturing(self):
+        return self._capturing
+    
+    @is_capturing.setter
+    def is_capturing(self, capturing):
+        self._capturing = capturing
+        # A finished capture lets the next queued request run
+        if not capturing:
+            self.root.after(0, self.pump_capture_requests)
+    
+    def request_capture(self, name, action, pressed_at):
+        """Queue a hotkey capture, it runs as soon as no capture is in progress"""
+        self.capture_requests.put(name, pressed_at, action)
+        self.pump_capture_requests()
+    
+    def pump_capture_requests(self):
+        """Start the oldest queued capture unless one is running"""
+        # An action can return without starting a capture (no saved region,
+        # no focused window), so go on with the next request until one runs
+        while not self.is_capturing and self.export_cancel is None:
+            request = self.capture_requests.get()
+            if request is None:
+                return
+            name, pressed_at, action = request
+            waited = (time.perf_counter() - pressed_at) * 1000
+            if waited > 100:
+                print(f"✓ Running queued '{name}' capture ({waited:.0f} ms after the key press)")
+            action(triggered_at=pressed_at)
+    
     def register_hotkeys(self):
-        """Register global hotkeys using Windows GetAsyncKeyState API"""
+        """Register global hotkeys delivered by Windows as WM_HOTKEY events"""
         try:
-            # Virtual key codes
-            VK_CONTROL = 0x11
-            VK_MENU = 0x12  # Alt key
-            VK_F = 0x46
-            VK_P = 0x50
-            
-            # Function to check if key is pressed
-            def is_key_pressed(vk):
-                """Check if a virtual key is currently pressed"""
-                return ctypes.windll.user32.GetAsyncKeyState(vk) & 0x8000
-            
-            def hotkey_listener():
-                """Background thread that listens for hotkey presses"""
-                last_f_pressed = False
-                last_p_pressed = False
-                
-                while True:
-                    try:
-                        ctrl = is_key_pressed(VK_CONTROL)
-                        alt = is_key_pressed(VK_MENU)
-                        f_pressed = is_key_pressed(VK_F)
-                        p_pressed = is_key_pressed(VK_P)
-                        
-                        # Ctrl+Alt+F
-                        if ctrl and alt and f_pressed and not last_f_pressed:
-                            print("✓ Ctrl+Alt+F detected - Taking screenshot...")
-                            self.root.after(0, self.take_screenshot)
-                            last_f_pressed = True
-                        elif not f_pressed:
-                            last_f_pressed = False
-                        
-                        # Ctrl+Alt+P
-                        if ctrl and alt and p_pressed and not last_p_pressed:
-                            print("✓ Ctrl+Alt+P detected - Starting partial capture...")
-                            self.root.after(0, self.partial_capture)
-                            last_p_pressed = True
-                        elif not p_pressed:
-                            last_p_pressed = False
-                        
-                        time.sleep(0.05)  # Poll every 50ms
-                    except Exception as e:
-                        print(f"Error in hotkey listener: {e}")
-                        time.sleep(0.5)
+            # Actions are scheduled on the Tk thread as soon as the key event arrives
+            self.hotkeys = HotkeyManager(Win32HotkeyBackend(), self.settings["hotkeys"],
+                                         dispatch=lambda action: self.root.after(0, action))
+            # Captures go through the request queue so presses during a
+            # running capture are not lost
+            def queued(name, action):
+                return lambda pressed_at: self.request_capture(name, action, pressed_at)
             
-            # Start listener thread
-            listener_thread = threading.Thread(target=hotkey_listener, daemon=False)
-            listener_thread.daemon = True
-            listener_thread.start()
+            self.hotkeys.bind("full", queued("full", self.take_screenshot))
+            self.hotkeys.bind("partial", queued("partial", self.partial_capture))
+            if self.replay:
+                self.hotkeys.bind("replay", lambda pressed_at: self.promote_replay())
+            self.hotkeys.bind("window", queued("window", self.smart_dropdown_capture))
+            self.hotkeys.bind("region", queued("region", partial(self.capture_region, self.settings["repeat_region"])))
+            for name in self.settings["hotkeys"]:
+                if name.startswith("region:"):
+                    self.hotkeys.bind(name, queued(name, partial(self.capture_region, name[len("region:"):])))
+            registered = self.hotkeys.start()
             
-            print("✓ Global hotkeys ACTIVE: Ctrl+Alt+F (Full) and Ctrl+Alt+P (Partial)")
+            active = ", ".join(f"{self.hotkeys.combos[name].title()} ({name})" for name in registered)
+            print(f"✓ Global hotkeys ACTIVE: {active}")
             print("✓ Works even when SnipIT is minimized or unfocused!")
             
         except Exception as e:
@@ -276,7 +2608,12 @@ class ScreenshotTool:
                                   cursor="hand2", width=24, height=24)
         self.help_btn.pack(side=tk.RIGHT, padx=(0, 1))
         
-    def partial_capture(self):
+        # Right-click anywhere on the toolbar to re-edit earlier screenshots
+        self.context_menu = tk.Menu(self.root, tearoff=0)
+        self.region_menu = tk.Menu(self.context_menu, tearoff=0)
+        self.root.bind("<Button-3>", self.show_context_menu)
+    
+    def partial_capture(self, triggered_at=None):
         """Start fullscreen overlay for region selection - Windows Snipping Tool style"""
         if self.is_capturing:
             return
@@ -284,14 +2621,40 @@ class ScreenshotTool:
         self.is_capturing = True
         self.partial_screenshot_mode = True
         
+        # Freeze-frame mode: grab the whole screen once, right now, and
+        # select on that image instead of the live screen. The grab runs on
+        # the capture worker and the overlay is built once the frame is back
+        if self.settings["partial_capture_mode"] == "freeze":
+            timer = CaptureTimer(triggered_at)
+            try:
+                self.hide_windows(self.root)
+                timer.mark("hidden")
+            except Exception as e:
+                self.partial_capture_failed(e)
+                return
+            
+            def grab():
+                image = self.capture.grab()
+                timer.mark("grabbed")
+                return image
+            
+            self.capture_worker.submit(grab, lambda image: self.show_selection_overlay(image, timer),
+                                       self.partial_capture_failed)
+            return
+        
+        self.show_selection_overlay()
+    
+    def show_selection_overlay(self, frozen_image=None, timer=None):
+        """Fullscreen overlay for region selection, over frozen_image in freeze-frame mode"""
         try:
             # Keep main window handle
             main_hwnd = self.root.winfo_id()
+            freeze_frame = frozen_image is not None
             
             # Create fullscreen overlay window
             self.selection_overlay = tk.Tk()
             self.selection_overlay.attributes("-fullscreen", True)
-            self.selection_overlay.attributes("-alpha", 0.3)  # Semi-transparent
+            self.selection_overlay.attributes("-alpha", 1.0 if freeze_frame else 0.3)  # Semi-transparent
             self.selection_overlay.attributes("-topmost", True)
             self.selection_overlay.config(bg="gray20")
             
@@ -306,6 +2669,18 @@ class ScreenshotTool:
             # Update window
             self.selection_overlay.update()
             
+            if freeze_frame:
+                # Show the frozen screen as the overlay background. The grab is in
+                # physical pixels, so scale it to the overlay if Windows scales the UI
+                overlay_width = self.selection_overlay.winfo_width()
+                overlay_height = self.selection_overlay.winfo_height()
+                frozen_scale = frozen_image.width / overlay_width if overlay_width else 1
+                background = frozen_image
+                if (overlay_width, overlay_height) != frozen_image.size:
+                    background = frozen_image.resize((overlay_width, overlay_height), Image.Resampling.BILINEAR)
+                canvas.frozen_photo = ImageTk.PhotoImage(background, master=self.selection_overlay)
+                canvas.create_image(0, 0, image=canvas.frozen_photo, anchor="nw")
+            
             # Use Windows API to make overlay transparent to mouse clicks but still visible
             HWND_TOPMOST = -1
             SWP_NOSIZE = 0x0001
@@ -316,18 +2691,69 @@ class ScreenshotTool:
             # Set window position to topmost
             ctypes.windll.user32.SetWindowPos(overlay_hwnd, HWND_TOPMOST, 0, 0, 0, 0, SWP_NOSIZE | SWP_NOMOVE)
             
-            # Small delay
-            time.sleep(0.05)
-
+            # Overlay items are created once and only moved while dragging, so
+            # redrawing costs the same however long the drag or large the selection:
+            # four dim rectangles around the selection, its outline and four handles.
+            # On the live screen the canvas background is a transparent colour key,
+            # so the area inside the selection is completely clear.
+            screen_width = self.selection_overlay.winfo_width()
+            screen_height = self.selection_overlay.winfo_height()
+            if freeze_frame:
+                dim_options = {"fill": "black", "stipple": "gray50", "outline": ""}
+            else:
+                clear_color = "#010203"
+                canvas.config(bg=clear_color)
+                self.selection_overlay.attributes("-transparentcolor", clear_color)
+                dim_options = {"fill": "gray20", "outline": ""}
+            dim_items = [canvas.create_rectangle(0, 0, 0, 0, **dim_options) for _ in range(4)]
+            canvas.coords(dim_items[0], 0, 0, screen_width, screen_height)
+            outline_item = canvas.create_rectangle(0, 0, 0, 0, outline="white", width=2, state="hidden")
+            handle_items = [canvas.create_rectangle(0, 0, 0, 0, fill="white", outline="white", state="hidden")
+                            for _ in range(4)]
+            frame_ms = display_refresh_interval_ms()
             
             # Selection state
             self.selection_data = {
                 "start_x": 0, "start_y": 0,
                 "end_x": 0, "end_y": 0,
-                "rect": None,
+                "redraw_pending": False,
                 "selecting": False
             }
             
+            def redraw_selection():
+                """Move the overlay items to the latest selection - at most once per frame"""
+                self.selection_data["redraw_pending"] = False
+                if not self.selection_overlay:
+                    return
+                
+                x1 = min(self.selection_data["start_x"], self.selection_data["end_x"])
+                y1 = min(self.selection_data["start_y"], self.selection_data["end_y"])
+                x2 = max(self.selection_data["start_x"], self.selection_data["end_x"])
+                y2 = max(self.selection_data["start_y"], self.selection_data["end_y"])
+                
+                # Rectangle in canvas coordinates
+                canvas_x1 = x1 - self.selection_overlay.winfo_rootx()
+                canvas_y1 = y1 - self.selection_overlay.winfo_rooty()
+                canvas_x2 = x2 - self.selection_overlay.winfo_rootx()
+                canvas_y2 = y2 - self.selection_overlay.winfo_rooty()
+                
+                # Dim everything outside the selection
+                canvas.coords(dim_items[0], 0, 0, screen_width, canvas_y1)
+                canvas.coords(dim_items[1], 0, canvas_y2, screen_width, screen_height)
+                canvas.coords(dim_items[2], 0, canvas_y1, canvas_x1, canvas_y2)
+                canvas.coords(dim_items[3], canvas_x2, canvas_y1, screen_width, canvas_y2)
+                
+                canvas.coords(outline_item, canvas_x1, canvas_y1, canvas_x2, canvas_y2)
+                canvas.itemconfigure(outline_item, state="normal")
+                
+                # Corner handles
+                handle_size = 5
+                for item, (hx, hy) in zip(handle_items, [(canvas_x1, canvas_y1), (canvas_x2, canvas_y1),
+                                                         (canvas_x1, canvas_y2), (canvas_x2, canvas_y2)]):
+                    canvas.coords(item, hx - handle_size, hy - handle_size,
+                                  hx + handle_size, hy + handle_size)
+                    canvas.itemconfigure(item, state="normal")
+            
             def on_mouse_down(event):
                 """Handle mouse button down"""
                 self.selection_data["start_x"] = event.x_root
@@ -337,10 +2763,12 @@ class ScreenshotTool:
                 self.selection_data["selecting"] = True
                 print(f"✓ Mouse down at ({event.x_root}, {event.y_root})")
                 
-                # Clear any previous rectangle
-                if self.selection_data["rect"]:
-                    canvas.delete(self.selection_data["rect"])
-                    self.selection_data["rect"] = None
+                # Clear any previous selection
+                canvas.coords(dim_items[0], 0, 0, screen_width, screen_height)
+                for item in dim_items[1:]:
+                    canvas.coords(item, 0, 0, 0, 0)
+                for item in [outline_item] + handle_items:
+                    canvas.itemconfigure(item, state="hidden")
             
             def on_mouse_move(event):
                 """Handle mouse motion while dragging"""
@@ -350,36 +2778,10 @@ class ScreenshotTool:
                 self.selection_data["end_x"] = event.x_root
                 self.selection_data["end_y"] = event.y_root
                 
-                # Delete previous rectangle
-                if self.selection_data["rect"]:
-                    canvas.delete(self.selection_data["rect"])
-                
-                # Draw new selection rectangle
-                x1 = min(self.selection_data["start_x"], self.selection_data["end_x"])
-                y1 = min(self.selection_data["start_y"], self.selection_data["end_y"])
-                x2 = max(self.selection_data["start_x"], self.selection_data["end_x"])
-                y2 = max(self.selection_data["start_y"], self.selection_data["end_y"])
-                
-                # Draw rectangle in canvas coordinates
-                canvas_x1 = x1 - self.selection_overlay.winfo_x()
-                canvas_y1 = y1 - self.selection_overlay.winfo_y()
-                canvas_x2 = x2 - self.selection_overlay.winfo_x()
-                canvas_y2 = y2 - self.selection_overlay.winfo_y()
-                
-                self.selection_data["rect"] = canvas.create_rectangle(
-                    canvas_x1, canvas_y1, canvas_x2, canvas_y2,
-                    outline="white", width=2, fill="blue"
-                )
-                
-                # Draw corner handles
-                handle_size = 5
-                for hx, hy in [(canvas_x1, canvas_y1), (canvas_x2, canvas_y1), 
-                               (canvas_x1, canvas_y2), (canvas_x2, canvas_y2)]:
-                    canvas.create_rectangle(
-                        hx - handle_size, hy - handle_size,
-                        hx + handle_size, hy + handle_size,
-                        fill="white", outline="white"
-                    )
+                # Coalesce motion events to the display refresh rate
+                if not self.selection_data["redraw_pending"]:
+                    self.selection_data["redraw_pending"] = True
+                    canvas.after(frame_ms, redraw_selection)
             
             def on_mouse_up(event):
                 """Handle mouse button release"""
@@ -400,7 +2802,12 @@ class ScreenshotTool:
                 if width >= 10 and height >= 10:
                     # Valid selection - show countdown dialog for dropdown preparation
                     try:
+                        overlay_x = self.selection_overlay.winfo_rootx()
+                        overlay_y = self.selection_overlay.winfo_rooty()
                         print("✓ Destroying overlay...")
+                        # Wait until the overlay is really off screen, so the change
+                        # watcher's first sample doesn't see its outline and handles
+                        self.hide_windows(self.selection_overlay)
                         self.selection_overlay.destroy()
                         self.selection_overlay = None
                         
@@ -410,7 +2817,65 @@ class ScreenshotTool:
                         x2 = max(self.selection_data["start_x"], self.selection_data["end_x"])
                         y2 = max(self.selection_data["start_y"], self.selection_data["end_y"])
                         
-                        print(f"✓ Selection bbox: ({x1}, {y1}, {x2}, {y2})")
+                        print(f"✓ Selection bbox: ({x1}, {y1}, {x2}, {y2})")
+                        
+                        # Remember the selection for repeat captures
+                        self.regions.save("last", (x1, y1, x2, y2))
+                        
+                        if freeze_frame:
+                            # Crop the frozen screen - no countdown and no second grab
+                            crop_box = tuple(round(value * frozen_scale) for value in
+                                             (x1 - overlay_x, y1 - overlay_y, x2 - overlay_x, y2 - overlay_y))
+                            self.current_partial_image = frozen_image.crop(crop_box)
+                            print(f"✓ Cropped frozen screen: {self.current_partial_image.size}")
+                            self.root.deiconify()
+                            self.open_markup_window(self.current_partial_image, timer)
+                            self.is_capturing = False
+                            self.partial_screenshot_mode = False
+                            return
+                        
+                        def perform_capture(timer):
+                            """Perform the actual screenshot capture"""
+                            try:
+                                # Hide overlay and main window before capturing
+                                windows = [self.root]
+                                if self.selection_overlay:
+                                    windows.append(self.selection_overlay)
+                                self.hide_windows(*windows)
+                                timer.mark("hidden")
+                                
+                                # Destroy overlay completely, it is hidden already
+                                try:
+                                    if self.selection_overlay:
+                                        self.selection_overlay.destroy()
+                                        self.selection_overlay = None
+                                except:
+                                    pass
+                                self.partial_screenshot_mode = False
+                                
+                                def grabbed(image):
+                                    self.current_partial_image = image
+                                    print(f"✓ Image captured: {image.size}")
+                                    
+                                    # Open markup window
+                                    self.open_markup_window(image, timer)
+                                    print("✓ Markup window opened")
+                                
+                                print(f"✓ Capturing bbox: ({x1}, {y1}, {x2}, {y2})")
+                                self.grab_in_background((x1, y1, x2, y2), timer, grabbed,
+                                                        "Failed to capture region")
+                            except Exception as e:
+                                print(f"✗ Error in capture: {e}")
+                                import traceback
+                                traceback.print_exc()
+                                self.root.deiconify()
+                                self.is_capturing = False
+                                self.partial_screenshot_mode = False
+                        
+                        if self.settings["partial_capture_mode"] == "change":
+                            # Capture when the region changes instead of after a countdown
+                            self.watch_for_change((x1, y1, x2, y2), perform_capture)
+                            return
                         
                         # Create a countdown window for dropdown preparation
                         countdown_window = tk.Toplevel(self.root)
@@ -449,51 +2914,9 @@ class ScreenshotTool:
                                 countdown_window.after(1000, countdown)
                             else:
                                 # Time's up - hide countdown window and capture
-                                countdown_window.withdraw()
-                                countdown_window.update_idletasks()
-                                self.root.update_idletasks()
-                                time.sleep(0.3)  # Increased delay for reliability
-                                perform_capture()
-                        
-                        def perform_capture():
-                            """Perform the actual screenshot capture"""
-                            try:
-                                # Hide overlay and main window before capturing
-                                if self.selection_overlay:
-                                    self.selection_overlay.withdraw()
-                                
-                                self.root.withdraw()
-                                self.root.update()
-                                time.sleep(0.1)
-                                
-                                print(f"✓ Capturing bbox: ({x1}, {y1}, {x2}, {y2})")
-                                self.current_partial_image = ImageGrab.grab(bbox=(x1, y1, x2, y2))
-                                print(f"✓ Image captured: {self.current_partial_image.size}")
-                                
-                                # Show main window
-                                self.root.deiconify()
-                                
-                                # Destroy overlay completely
-                                try:
-                                    if self.selection_overlay:
-                                        self.selection_overlay.destroy()
-                                        self.selection_overlay = None
-                                except:
-                                    pass
-                                
-                                # Open markup window
-                                self.open_markup_window(self.current_partial_image)
-                                print("✓ Markup window opened")
-                                
-                                self.is_capturing = False
-                                self.partial_screenshot_mode = False
-                            except Exception as e:
-                                print(f"✗ Error in capture: {e}")
-                                import traceback
-                                traceback.print_exc()
-                                self.root.deiconify()
-                                self.is_capturing = False
-                                self.partial_screenshot_mode = False
+                                timer = CaptureTimer()
+                                self.hide_windows(countdown_window)
+                                perform_capture(timer)
                         
                         # Start countdown
                         countdown_window.after(1000, countdown)
@@ -520,8 +2943,9 @@ class ScreenshotTool:
                         "Invalid Selection", 
                         "Selection must be at least 10x10 pixels.\nTry again."
                     )
-                    # Hide again for retry
-                    self.root.withdraw()
+                    # The overlay is gone, so end this capture and let the user start over
+                    self.is_capturing = False
+                    self.partial_screenshot_mode = False
             
             def on_key_press(event):
                 """Handle key presses"""
@@ -560,12 +2984,17 @@ class ScreenshotTool:
             print("✓ Press Escape to cancel")
             
         except Exception as e:
-            print(f"✗ Error in partial_capture: {e}")
-            import traceback
-            traceback.print_exc()
-            self.is_capturing = False
-            self.partial_screenshot_mode = False
-            messagebox.showerror("Error", f"Failed to start partial capture: {str(e)}")
+            self.partial_capture_failed(e)
+    
+    def partial_capture_failed(self, error):
+        """End a partial capture that could not start its selection overlay"""
+        print(f"✗ Error in partial_capture: {error}")
+        import traceback
+        traceback.print_exception(type(error), error, error.__traceback__)
+        self.root.deiconify()
+        self.is_capturing = False
+        self.partial_screenshot_mode = False
+        messagebox.showerror("Error", f"Failed to start partial capture: {str(error)}")
         
     def center_window(self):
         """Position the floating window 45 pixels away from both corners"""
@@ -599,50 +3028,385 @@ class ScreenshotTool:
             self.x = event.x_root
             self.y = event.y_root
         
-    def take_screenshot(self):
-        """Take a screenshot of the entire screen"""
+    def show_context_menu(self, event):
+        """Right-click menu of the toolbar, rebuilt for the current session"""
+        self.context_menu.delete(0, tk.END)
+        if self.scheduler and self.scheduler.running():
+            self.context_menu.add_command(label="Stop Scheduled Capture", command=self.stop_scheduled_capture)
+        else:
+            self.context_menu.add_command(label=f"Interval Capture (every {self.settings['interval_seconds']}s)",
+                                          command=lambda: self.start_scheduled_capture("interval"))
+            self.context_menu.add_command(label=f"Burst Capture ({self.settings['burst_count']} frames)",
+                                          command=lambda: self.start_scheduled_capture("burst"))
+        self.context_menu.add_separator()
+        
+        # Saved regions: capture one straight away, or save the last selection
+        self.region_menu.delete(0, tk.END)
+        for name in self.regions.names():
+            self.region_menu.add_command(label=name, command=lambda name=name: self.capture_region(name))
+        self.context_menu.add_cascade(label="Capture Region", menu=self.region_menu,
+                                      state=tk.NORMAL if self.regions.names() else tk.DISABLED)
+        self.context_menu.add_command(label="Save Last Region As...", command=self.save_last_region,
+                                      state=tk.NORMAL if self.regions.get("last") else tk.DISABLED)
+        self.context_menu.add_separator()
+        if not self.screenshots:
+            self.context_menu.add_command(label="No screenshots yet", state=tk.DISABLED)
+        # Changing markups would invalidate the export bytes the export is writing
+        exporting = self.export_cancel is not None
+        for index in range(len(self.screenshots)):
+            self.context_menu.add_command(label=f"Edit Screenshot {index + 1}",
+                                          command=lambda index=index: self.edit_screenshot(index),
+                                          state=tk.DISABLED if exporting else tk.NORMAL)
+        self.context_menu.tk_popup(event.x_root, event.y_root)
+    
+    def save_last_region(self):
+        """Save the last partial capture selection under a name"""
+        name = simpledialog.askstring("Save Region", "Name for the last selected region:", parent=self.root)
+        if name and name.strip() and name.strip() != "last":
+            self.regions.save(name.strip(), self.regions.get("last"))
+            print(f"✓ Region '{name.strip()}' saved: {self.regions.get(name.strip())}")
+    
+    def capture_region(self, name, triggered_at=None):
+        """Capture a saved region at once - no overlay, no countdown, markup only if enabled"""
         if self.is_capturing:
             return
-            
-        self.is_capturing = True
+        bbox = self.regions.get(name)
+        if not bbox:
+            print(f"✗ No saved region '{name}' - make a partial capture first")
+            return
         
+        self.is_capturing = True
+        timer = CaptureTimer(triggered_at)
         try:
-            # Hide the floating window
-            self.root.withdraw()
-            
-            # Small delay to ensure window is hidden
-            self.root.update()
-            time.sleep(0.1)
-            
-            # Take screenshot
-            screenshot = ImageGrab.grab()
-            
-            # Show window again
+            self.hide_windows(self.root)
+            timer.mark("hidden")
+        except Exception as e:
             self.root.deiconify()
+            messagebox.showerror("Error", f"Failed to capture region: {str(e)}")
+            self.is_capturing = False
+            return
+        
+        def grabbed(image):
+            print(f"✓ Region '{name}' captured: {image.size}")
+            
+            if self.settings["region_markup"]:
+                self.open_markup_window(image, timer)
+                return
             
             # Get comment only if checkbox is enabled
             comment = ""
             if self.add_comment_var.get():
                 comment = self.get_comment()
-                if comment is None:  # User clicked cancel
-                    self.is_capturing = False
+                timer.mark("comment")
+                if comment is None:
                     return
-                    
-            # Store screenshot data
-            timestamp = datetime.now()
-            self.screenshots.append({
-                'image': screenshot,
-                'comment': comment,
+            self.store_in_background(image, timer, comment)
+        
+        self.grab_in_background(bbox, timer, grabbed, "Failed to capture region")
+    
+    def start_scheduled_capture(self, mode):
+        """Start interval or burst capture on a background thread"""
+        if self.scheduler and self.scheduler.running():
+            return
+        
+        if mode == "burst":
+            interval = 1 / max(0.1, self.settings["burst_rate_hz"])
+            count = self.settings["burst_count"]
+        else:
+            interval = max(0.1, self.settings["interval_seconds"])
+            count = None
+        region = self.settings["scheduled_region"]
+        if isinstance(region, str):
+            region = self.regions.get(region)
+        
+        # Frames are grabbed while the toolbar stays up, so keep it out of them
+        self.exclude_from_capture(self.root, True)
+        self.scheduler = CaptureScheduler(
+            create_capture_backend(self.settings["capture_backend"]),
+            lambda image, timestamp, timer: self.store_capture(image, timer, timestamp=timestamp),
+            interval, count=count,
+            bbox=tuple(region) if region else self.monitors.capture_bbox(self.settings["capture_monitor"]),
+            threshold=self.settings["scheduled_change_threshold"],
+            max_frames=self.settings["scheduled_max_frames"],
+        )
+        self.scheduler.start()
+        print(f"✓ {mode.title()} capture started")
+    
+    def stop_scheduled_capture(self, timeout=None):
+        if self.scheduler:
+            self.scheduler.stop(timeout)
+        # Instant replay keeps grabbing with the toolbar up
+        self.exclude_from_capture(self.root, self.replay is not None)
+    
+    def start_replay(self):
+        """Start buffering frames in the background for instant replay"""
+        self.exclude_from_capture(self.root, True)
+        self.replay = ReplayBuffer(create_capture_backend(self.settings["capture_backend"]),
+                                   seconds=self.settings["replay_seconds"],
+                                   fps=self.settings["replay_fps"],
+                                   budget_mb=self.settings["replay_budget_mb"],
+                                   locate=lambda: self.monitors.capture_bbox(self.settings["capture_monitor"]))
+        self.replay.start()
+        print(f"✓ Instant replay buffering the last {self.settings['replay_seconds']}s")
+    
+    def promote_replay(self):
+        """Add the buffered replay frames to the session with their original timestamps"""
+        if self.export_cancel is not None:
+            return
+        frames = self.replay.take()
+        if not frames:
+            print("✗ Instant replay buffer is empty")
+            return
+        
+        now = time.perf_counter()
+        for grabbed_at, timestamp, size, mode, digest, data in frames:
+            # The encoded bytes move into the session as they are
+            index = self.screenshots.append_encoded({
+                'comment': f"Instant replay, {now - grabbed_at:.1f}s before it was saved",
                 'timestamp': timestamp
-            })
+            }, data, size, mode, digest)
+            if self.journal:
+                self.journal.add(index)
+        print(f"✓ Saved {len(frames)} instant replay frames "
+              f"({sum(len(frame[-1]) for frame in frames) // 1024} KB)")
+    
+    def exclude_from_capture(self, window, exclude):
+        """Hide a window from screen captures without hiding it from the user (Windows 10 2004+)"""
+        WDA_NONE = 0x0
+        WDA_EXCLUDEFROMCAPTURE = 0x11
+        hwnd = int(window.wm_frame(), 16)
+        if not ctypes.windll.user32.SetWindowDisplayAffinity(hwnd, WDA_EXCLUDEFROMCAPTURE if exclude else WDA_NONE):
+            if exclude:
+                print("✗ Could not exclude the toolbar from captures, it will appear in scheduled frames")
+    
+    def edit_screenshot(self, index):
+        """Reopen the markup window on an earlier screenshot with its markups"""
+        if self.export_cancel is not None:
+            return
+        self.open_markup_window(self.screenshots.image(index), index=index)
+    
+    def hide_windows(self, *windows, timeout=0.5):
+        """
+        Withdraw windows and wait until Windows reports them hidden.
+        
+        Polls the real window visibility instead of sleeping a fixed time, then
+        waits for the compositor to present a frame without them. Returns False
+        if they were still visible after timeout seconds.
+        """
+        for window in windows:
+            window.withdraw()
+        hwnds = [int(window.wm_frame(), 16) for window in windows]
+        
+        deadline = time.perf_counter() + timeout
+        while True:
+            for window in windows:
+                window.update_idletasks()
+            if not any(ctypes.windll.user32.IsWindowVisible(hwnd) for hwnd in hwnds):
+                break
+            if time.perf_counter() >= deadline:
+                print(f"✗ Windows still visible after {timeout * 1000:.0f} ms, capturing anyway")
+                return False
+            time.sleep(0.002)
+        
+        try:
+            ctypes.windll.dwmapi.DwmFlush()
+        except Exception:
+            pass
+        return True
+    
+    def watch_for_change(self, bbox, on_capture):
+        """
+        "change" trigger of partial_capture: show a small status window next
+        to bbox and call on_capture(timer) once the region's content changed
+        and settled, or when the timeout runs out.
+        """
+        status_window = tk.Toplevel(self.root)
+        status_window.attributes("-topmost", True)
+        status_window.overrideredirect(True)
+        status_window.configure(bg="#333333")
+        
+        tk.Label(status_window, text="Open your dropdown/menu now -\ncapturing when the selection changes",
+                 font=("Arial", 9), bg="#333333", fg="white").pack(side=tk.LEFT, padx=8, pady=6)
+        
+        # Keep the status window out of the watched region
+        x1, y1, x2, y2 = bbox
+        status_window.update_idletasks()
+        height = status_window.winfo_reqheight()
+        y = y2 + 10 if y2 + 10 + height < status_window.winfo_screenheight() else max(0, y1 - 10 - height)
+        status_window.geometry(f"+{max(0, x1)}+{y}")
+        
+        # GDI copies just the region; ImageGrab would grab the whole desktop and
+        # crop it on every sample, whatever capture_backend is configured
+        watcher = RegionChangeWatcher(
+            GdiCaptureBackend(), bbox,
+            rate_hz=self.settings["change_sample_hz"],
+            settle_ms=self.settings["change_settle_ms"],
+            timeout_s=self.settings["change_timeout_s"],
+            threshold=self.settings["change_threshold"],
+        )
+        tk.Button(status_window, text="Cancel", command=watcher.cancel,
+                  bg="#f44336", fg="white", font=("Arial", 8)).pack(side=tk.RIGHT, padx=6)
+        
+        def finish(reason, triggered_at):
+            print(f"✓ Region watcher: {reason} ({watcher.summary()})")
+            if reason == "cancelled":
+                status_window.destroy()
+                self.root.deiconify()
+                self.is_capturing = False
+                self.partial_screenshot_mode = False
+                return
+            # A timeout or sampling error still captures, like the countdown would
+            timer = CaptureTimer(triggered_at)
+            self.hide_windows(status_window)
+            on_capture(timer)
+            status_window.destroy()
+        
+        # The watcher calls back from its thread, run the capture on the Tk thread
+        watcher.start(lambda reason: self.root.after(0, finish, reason, time.perf_counter()))
+    
+    def record_capture_timing(self, timer, index=None):
+        """Keep the phase timings of a capture, on its shot record if it was stored"""
+        timings = timer.as_dict()
+        self.capture_timings.append(timings)
+        if index is not None:
+            self.screenshots[index]['timings'] = timings
+        print(f"✓ Capture timing: {timer.summary()}")
+    
+    def resume_session(self):
+        """
+        Offer to resume sessions whose journal was left behind, newest first.
+        Returns the resumed session's journal, None if nothing was resumed;
+        declined journals are deleted.
+        """
+        for path in SessionJournal.unfinished():
+            try:
+                shots, edits, valid_length = SessionJournal.read(path)
+            except Exception as e:
+                print(f"✗ Could not read session journal {path}: {e}")
+                continue
             
-            print("✓ Full screenshot captured")
+            if shots and messagebox.askyesno(
+                    "Resume Session",
+                    f"SnipIT found an unfinished session with {len(shots)} screenshots "
+                    f"from {shots[0]['timestamp'].strftime('%Y-%m-%d %H:%M')}.\n\n"
+                    f"Resume it?"):
+                # The journaled PNG bytes go into the store as they are
+                for shot in shots:
+                    self.screenshots.append_encoded({
+                        'comment': shot['comment'],
+                        'timestamp': shot['timestamp'],
+                        'markups': shot['markups']
+                    }, shot['data'], shot['size'], shot['mode'], shot['digest'])
+                for index, markups in edits:
+                    self.screenshots.set_markups(index, markups)
+                print(f"✓ Resumed {len(shots)} screenshots from {path}")
+                if [shot['index'] for shot in shots] == list(range(len(shots))):
+                    return SessionJournal(self.screenshots, path, valid_length,
+                                          digests=(shot['digest'] for shot in shots),
+                                          batch_ms=self.settings["journal_batch_ms"])
                 
+                # Records are missing, so new shots would reuse journaled indexes:
+                # journal the resumed session afresh instead
+                journal = SessionJournal(self.screenshots, batch_ms=self.settings["journal_batch_ms"])
+                for index in range(len(shots)):
+                    journal.add(index)
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+                return journal
+            
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        return None
+    
+    def store_capture(self, image, timer=None, comment="", timestamp=None, markups=None):
+        """Add a captured image to the session and queue it for background encoding"""
+        index = self.screenshots.append({
+            'image': image,
+            'markups': markups or [],
+            'comment': comment,
+            'timestamp': timestamp or datetime.now()
+        })
+        self.encoder.submit(index)
+        if self.journal:
+            self.journal.add(index)
+        if timer:
+            timer.mark("stored")
+            self.record_capture_timing(timer, index)
+        return index
+    
+    def store_in_background(self, image, timer=None, comment="", markups=None):
+        """Store a capture on the capture worker - hashing and queueing happen off the Tk thread"""
+        timestamp = datetime.now()
+        self.capture_worker.submit(
+            lambda: self.store_capture(image, timer, comment, timestamp=timestamp, markups=markups))
+    
+    def grab_in_background(self, bbox, timer, on_grabbed, error_message):
+        """
+        Grab bbox on the capture worker while the Tk thread stays free, then show
+        the toolbar again and call on_grabbed(image) on the Tk thread. The
+        capture ends when on_grabbed returns; a failed grab shows error_message.
+        """
+        def grab():
+            image = self.capture.grab(bbox=bbox)
+            timer.mark("grabbed")
+            return image
+        
+        def grabbed(image):
+            try:
+                self.root.deiconify()
+                on_grabbed(image)
+            except Exception as e:
+                messagebox.showerror("Error", f"{error_message}: {str(e)}")
+            finally:
+                self.is_capturing = False
+        
+        def failed(error):
+            self.root.deiconify()
+            messagebox.showerror("Error", f"{error_message}: {str(error)}")
+            self.is_capturing = False
+        
+        self.capture_worker.submit(grab, grabbed, failed)
+    
+    def take_screenshot(self, triggered_at=None):
+        """Take a screenshot of the entire screen"""
+        if self.is_capturing:
+            return
+            
+        self.is_capturing = True
+        timer = CaptureTimer(triggered_at)
+        
+        try:
+            # Hide the floating window and wait until it is really gone
+            self.hide_windows(self.root)
+            timer.mark("hidden")
+            
+            # Take screenshot of the configured monitor(s) only
+            bbox = self.monitors.capture_bbox(self.settings["capture_monitor"])
         except Exception as e:
             self.root.deiconify()
             messagebox.showerror("Error", f"Failed to take screenshot: {str(e)}")
-        finally:
             self.is_capturing = False
+            return
+        
+        def grabbed(screenshot):
+            # Get comment only if checkbox is enabled
+            comment = ""
+            if self.add_comment_var.get():
+                comment = self.get_comment()
+                timer.mark("comment")
+                if comment is None:  # User clicked cancel
+                    return
+            
+            # Store screenshot data
+            self.store_in_background(screenshot, timer, comment)
+            
+            print("✓ Full screenshot captured")
+        
+        self.grab_in_background(bbox, timer, grabbed, "Failed to take screenshot")
             
     def get_comment(self):
         """Get a comment from the user for the screenshot"""
@@ -661,9 +3425,7 @@ class ScreenshotTool:
         
         try:
             # Hide the floating window
-            self.root.withdraw()
-            self.root.update()
-            time.sleep(0.1)
+            self.hide_windows(self.root)
             
             # Create selection window
             self.create_selection_window()
@@ -674,38 +3436,56 @@ class ScreenshotTool:
             self.is_capturing = False
             self.partial_screenshot_mode = False
             
-    def smart_dropdown_capture(self):
-        """Capture the focused window with auto-padding"""
+    def smart_dropdown_capture(self, triggered_at=None):
+        """Capture the foreground window with padding, clipped to its monitor"""
+        if self.is_capturing:
+            return
+        
+        self.is_capturing = True
+        timer = CaptureTimer(triggered_at)
         try:
-            # Get focused window
-            hwnd = win32gui.GetForegroundWindow()
-            if not hwnd:
+            # Get focused window (cached until the foreground window changes)
+            foreground = self.windows.foreground()
+            if not foreground or foreground[0] == int(self.root.wm_frame(), 16):
                 messagebox.showerror("Error", "Could not get focused window.")
+                self.is_capturing = False
                 return
             
-            # Get window rectangle
-            rect = win32gui.GetWindowRect(hwnd)
-            x1, y1, x2, y2 = rect
-            
-            # Add 50px padding
-            x1 = max(0, x1 - 50)
-            y1 = max(0, y1 - 50)
-            x2 = x2 + 50
-            y2 = y2 + 50
+            # Add padding, but never past the edge of the window's monitor
+            x1, y1, x2, y2 = foreground[1]
+            padding = self.settings["window_padding"]
+            x1, y1, x2, y2 = self.monitors.clamp((x1 - padding, y1 - padding, x2 + padding, y2 + padding))
+            if x2 - x1 < 10 or y2 - y1 < 10:
+                messagebox.showerror("Error", "The focused window is not on screen.")
+                self.is_capturing = False
+                return
             
             # Capture region
-            self.current_partial_image = ImageGrab.grab(bbox=(x1, y1, x2, y2))
-            
-            # Open markup window
-            self.open_markup_window(self.current_partial_image)
-            
+            self.hide_windows(self.root)
+            timer.mark("hidden")
         except Exception as e:
+            self.root.deiconify()
             messagebox.showerror("Error", f"Failed to capture window: {str(e)}")
+            self.is_capturing = False
+            return
+        
+        def grabbed(image):
+            self.current_partial_image = image
+            print(f"✓ Window captured: {image.size}")
+            
+            # Open markup window
+            self.open_markup_window(image, timer)
+        
+        self.grab_in_background((x1, y1, x2, y2), timer, grabbed, "Failed to capture window")
     
-    def open_markup_window(self, image):
-        """Open a window to markup/annotate the screenshot"""
+    def open_markup_window(self, image, timer=None, index=None):
+        """Open a window to markup/annotate the screenshot, or to re-edit shot index"""
         markup_window = tk.Toplevel(self.root)
-        markup_window.title("Partial Capture - Markup")
+        self.markup_windows.append(markup_window)
+        if index is None:
+            markup_window.title("Partial Capture - Markup")
+        else:
+            markup_window.title(f"Edit Screenshot {index + 1}")
         markup_window.attributes("-topmost", True)
         
         # Calculate canvas size based on image dimensions (max 800px)
@@ -733,33 +3513,51 @@ class ScreenshotTool:
                           width=display_width, height=display_height)
         canvas.pack(fill=tk.BOTH, expand=True)
         
-        # Display image on canvas (resized if needed)
-        display_image = image.copy()
-        if display_width != img_width or display_height != img_height:
-            display_image = display_image.resize((display_width, display_height), Image.Resampling.LANCZOS)
-        
-        photo = ImageTk.PhotoImage(display_image)
-        img_on_canvas = canvas.create_image(0, 0, image=photo, anchor="nw")
-        canvas.image = photo
-        canvas.photo = photo
-        
-        # Store original image reference for capture
+        # Tiled view of the image: starts fitted to the window, zooms with the
+        # mouse wheel and pans with the right (or middle) mouse button
         canvas.original_image = image
-        canvas.display_image = display_image
-        canvas.scale_factor = display_width / img_width if img_width > 0 else 1
+        view = TiledImageView(canvas, image, display_width / img_width if img_width > 0 else 1)
+        canvas.view = view
         
         # Tool selection variables
         tool_var = tk.StringVar(value="rectangle")
         color_var = tk.StringVar(value="red")
         
-        # Drawing state and markup storage
-        drawing_data = {"drawing": False, "rect_id": None, "markups": []}
+        # Drawing state and markup storage (markups in original image pixels)
+        markups = self.screenshots.markups(index) if index is not None else []
+        drawing_data = {"drawing": False, "rect_id": None, "markups": markups}
+        
+        def redraw_markups():
+            """Draw the stored markups at the current zoom and pan"""
+            canvas.delete("markup")
+            for markup in drawing_data["markups"]:
+                if markup["type"] == "draw":
+                    coords = [value for point in markup["points"] for value in view.to_canvas(*point)]
+                    if len(coords) == 2:
+                        coords *= 2
+                    canvas.create_line(*coords, fill=markup["color"], width=2,
+                                       capstyle=tk.ROUND, joinstyle=tk.ROUND, tags="markup")
+                    continue
+                x1, y1 = view.to_canvas(markup["x1"], markup["y1"])
+                x2, y2 = view.to_canvas(markup["x2"], markup["y2"])
+                create = canvas.create_rectangle if markup["type"] == "rectangle" else canvas.create_oval
+                create(x1, y1, x2, y2, outline=markup["color"], width=2, tags="markup")
+        
+        view.on_change = redraw_markups
         
         def start_draw(event):
             drawing_data["drawing"] = True
             drawing_data["last_x"] = event.x
             drawing_data["last_y"] = event.y
             drawing_data["rect_id"] = None
+            
+            if tool_var.get() == "draw":
+                # One polyline item per stroke, extended in place while dragging
+                drawing_data["points"] = [(event.x, event.y)]
+                drawing_data["rect_id"] = canvas.create_line(
+                    event.x, event.y, event.x, event.y,
+                    fill=color_var.get(), width=2, capstyle=tk.ROUND, joinstyle=tk.ROUND
+                )
         
         def on_mouse_drag(event):
             if not drawing_data["drawing"]:
@@ -786,15 +3584,14 @@ class ScreenshotTool:
                     event.x, event.y,
                     outline=color, width=2
                 )
-            elif tool == "draw":
-                # Draw line
-                canvas.create_line(
-                    drawing_data["last_x"], drawing_data["last_y"],
-                    event.x, event.y,
-                    fill=color, width=2
-                )
-                drawing_data["last_x"] = event.x
-                drawing_data["last_y"] = event.y
+            elif tool == "draw" and drawing_data["rect_id"] is not None:
+                # Skip motion under a pixel, then extend the stroke's polyline
+                last_x, last_y = drawing_data["points"][-1]
+                if abs(event.x - last_x) + abs(event.y - last_y) < 2:
+                    return
+                drawing_data["points"].append((event.x, event.y))
+                canvas.coords(drawing_data["rect_id"],
+                              *[value for point in drawing_data["points"] for value in point])
         
         def stop_draw(event):
             tool = tool_var.get()
@@ -802,12 +3599,9 @@ class ScreenshotTool:
             
             # Store markup data for later redrawing
             if drawing_data["drawing"]:
-                # Scale coordinates back to original image size
-                scale_factor = canvas.scale_factor
-                x1 = int(drawing_data["last_x"] / scale_factor)
-                y1 = int(drawing_data["last_y"] / scale_factor)
-                x2 = int(event.x / scale_factor)
-                y2 = int(event.y / scale_factor)
+                # Map canvas coordinates back to original image pixels
+                x1, y1 = (round(value) for value in view.to_image(drawing_data["last_x"], drawing_data["last_y"]))
+                x2, y2 = (round(value) for value in view.to_image(event.x, event.y))
                 
                 if tool == "rectangle":
                     drawing_data["markups"].append({
@@ -827,20 +3621,44 @@ class ScreenshotTool:
                         "y2": y2,
                         "color": color
                     })
-                elif tool == "draw":
-                    # Store draw strokes
+                elif tool == "draw" and drawing_data["rect_id"] is not None:
+                    # Store the whole stroke, decimated to within half a display
+                    # pixel, as one polyline in original image coordinates
+                    drawing_data["points"].append((event.x, event.y))
+                    points = simplify_polyline(drawing_data["points"], 0.5)
                     drawing_data["markups"].append({
                         "type": "draw",
-                        "x1": x1,
-                        "y1": y1,
-                        "x2": x2,
-                        "y2": y2,
+                        "points": [tuple(round(value) for value in view.to_image(x, y)) for x, y in points],
                         "color": color
                     })
+                
+                # Replace the preview with the stored markup
+                if drawing_data["rect_id"] is not None:
+                    canvas.delete(drawing_data["rect_id"])
+                redraw_markups()
             
             drawing_data["drawing"] = False
             drawing_data["rect_id"] = None
         
+        def start_pan(event):
+            drawing_data["pan_x"] = event.x
+            drawing_data["pan_y"] = event.y
+        
+        def do_pan(event):
+            view.pan(event.x - drawing_data["pan_x"], event.y - drawing_data["pan_y"])
+            drawing_data["pan_x"] = event.x
+            drawing_data["pan_y"] = event.y
+        
+        def on_wheel(event):
+            if not drawing_data["drawing"]:
+                view.zoom_at(1.25 if event.delta > 0 else 0.8, event.x, event.y)
+        
+        for button in ("2", "3"):
+            canvas.bind(f"<ButtonPress-{button}>", start_pan)
+            canvas.bind(f"<B{button}-Motion>", do_pan)
+        canvas.bind("<MouseWheel>", on_wheel)
+        canvas.bind("<Configure>", lambda event: view.render())
+        
         canvas.bind("<Button-1>", start_draw)
         canvas.bind("<B1-Motion>", on_mouse_drag)
         canvas.bind("<ButtonRelease-1>", stop_draw)
@@ -886,48 +3704,39 @@ class ScreenshotTool:
         tk.Label(green_container, bg="green", width=2, height=1).pack(side=tk.LEFT, padx=1)
         
         # Save button - pass drawing_data to save_markup
-        tk.Button(control_frame, text="Save", command=lambda: self.save_markup(markup_window, image, drawing_data),
+        tk.Button(control_frame, text="Save", command=lambda: self.save_markup(markup_window, image, drawing_data, timer, index),
                  bg="#4CAF50", fg="white", font=("Arial", 8)).pack(side=tk.LEFT, padx=5)
         
         # Clear button - clear all markups
         def clear_markups():
             drawing_data["markups"] = []
-            # Redraw canvas with original image
-            canvas.delete("all")
-            canvas.create_image(0, 0, image=canvas.photo, anchor="nw")
+            redraw_markups()
         
         tk.Button(control_frame, text="Clear", command=clear_markups,
                  bg="#FF9800", fg="white", font=("Arial", 8)).pack(side=tk.LEFT, padx=2)
         
-    def save_markup(self, window, original_image, drawing_data):
-        """Save the marked up screenshot"""
+        # Fit button - back to the whole image
+        tk.Button(control_frame, text="Fit", command=view.fit,
+                 bg="#2196F3", fg="white", font=("Arial", 8)).pack(side=tk.LEFT, padx=2)
+    
+    def save_markup(self, window, original_image, drawing_data, timer=None, index=None):
+        """Save the markups of a screenshot - they stay vectors until export"""
+        # A markup window opened before End can't change the shots the export is writing
+        if self.export_cancel is not None:
+            messagebox.showwarning("Export Running",
+                                   "The document is being exported.\nSave once the export is done.",
+                                   parent=window)
+            return
         window.destroy()
         
-        # Apply markups to the image using PIL
-        marked_image = original_image.copy()
-        
-        if drawing_data["markups"]:
-            draw = ImageDraw.Draw(marked_image)
-            
-            for markup in drawing_data["markups"]:
-                if markup["type"] == "rectangle":
-                    draw.rectangle(
-                        [markup["x1"], markup["y1"], markup["x2"], markup["y2"]],
-                        outline=markup["color"],
-                        width=2
-                    )
-                elif markup["type"] == "circle":
-                    draw.ellipse(
-                        [markup["x1"], markup["y1"], markup["x2"], markup["y2"]],
-                        outline=markup["color"],
-                        width=2
-                    )
-                elif markup["type"] == "draw":
-                    draw.line(
-                        [markup["x1"], markup["y1"], markup["x2"], markup["y2"]],
-                        fill=markup["color"],
-                        width=2
-                    )
+        # Re-editing an earlier shot only replaces its markups
+        if index is not None:
+            self.screenshots.set_markups(index, drawing_data["markups"])
+            self.encoder.submit(index)
+            if self.journal:
+                self.journal.update_markups(index, drawing_data["markups"])
+            print(f"✓ Screenshot {index + 1} markups updated")
+            return
         
         # Get comment if enabled
         comment = ""
@@ -936,13 +3745,12 @@ class ScreenshotTool:
             if comment is None:
                 return
         
-        # Store screenshot with markups applied
-        timestamp = datetime.now()
-        self.screenshots.append({
-            'image': marked_image,
-            'comment': comment,
-            'timestamp': timestamp
-        })
+        # The time spent in the markup window is part of the "marked up" phase
+        if timer:
+            timer.mark("marked up")
+        
+        # Store the unmodified screenshot with its markups alongside
+        self.store_in_background(original_image, timer, comment, markups=drawing_data["markups"])
         
     def get_comment(self):
         """Get a comment from the user for the screenshot"""
@@ -957,8 +3765,7 @@ class ScreenshotTool:
 
 KEYBOARD SHORTCUTS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Ctrl+Alt+F  - Full Screen Capture
-Ctrl+Alt+P  - Partial Capture (with selection)
+{shortcuts}
 
 Perfect for capturing expanded dropdowns without
 losing focus to the web application!
@@ -972,61 +3779,228 @@ Personal Email:
 nanthishwaran579@gmail.com
 
 """
-        messagebox.showinfo("SnipIT Help", help_text)
+        descriptions = {
+            "full": "Full Screen Capture",
+            "partial": "Partial Capture (with selection)",
+            "replay": "Save Instant Replay",
+            "window": "Active Window Capture",
+            "region": "Repeat Last Region Capture",
+        }
+        shortcuts = "\n".join(f"{combo.title():<12}- {descriptions.get(name, name)}"
+                               for name, combo in self.settings["hotkeys"].items()
+                               if combo and (not self.hotkeys or name in self.hotkeys.actions))
+        messagebox.showinfo("SnipIT Help", help_text.format(shortcuts=shortcuts))
     
     def close_tool(self):
         """Close the tool with confirmation"""
+        if self.export_cancel is not None:
+            if messagebox.askyesno("Close", "The document is still being exported.\n"
+                                            "Cancel the export and close SnipIT?"):
+                self.export_cancel.set()
+                self.root.quit()
+            return
         if messagebox.askyesno("Close", "Are you sure you want to close SnipIT?"):
             self.root.quit()
         
+    def encode_pending_shots(self, profile, on_progress=None, cancel=None):
+        """
+        Encode all shots still missing bytes for the export profile in the
+        process pool, calling on_progress(done, total) as they finish and
+        raising ExportCancelled once cancel is set.
+        """
+        # Archival embeds the stored full-resolution PNG of plain shots; any
+        # profile composites the markups of annotated shots at export time
+        archival = EXPORT_PROFILES[profile]["dpi"] is None
+        pending = self.screenshots.pending_encodes() if archival else []
+        annotated = self.screenshots.pending_exports(profile)
+        if not pending and not annotated:
+            return
+        
+        workers = self.settings["export_workers"] or os.cpu_count() or 1
+        workers = min(workers, max(len(pending), len(annotated)))
+        
+        total = len(pending) + len(annotated)
+        done = 0
+        
+        def advance():
+            nonlocal done
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+        
+        start = time.perf_counter()
+        jobs = (self.screenshots.export_source(index) for index in pending)
+        for index, data in zip(pending, encode_in_pool(jobs, workers)):
+            self.screenshots.set_encoded(index, data)
+            advance()
+        
+        jobs = ((self.screenshots.export_source(index), self.screenshots.markups(index))
+                for index in annotated)
+        encode = partial(encode_export, profile=profile)
+        for index, result in zip(annotated, encode_in_pool(jobs, workers, encode)):
+            self.screenshots.set_export(index, profile, result)
+            advance()
+        print(f"✓ Encoded {total} screenshots on {workers} workers "
+              f"in {time.perf_counter() - start:.2f}s")
+    
+    def shot_export_bytes(self, index, profile):
+        """(data, content_type, ext, codec) of a shot for profile, encoded now if they are missing"""
+        export = self.screenshots.export_bytes(index, profile)
+        if export is not None:
+            return export
+        markups = self.screenshots.markups(index)
+        result = encode_export((self.screenshots.export_source(index), markups), profile)
+        self.screenshots.set_export(index, profile, result, markup_key(markups))
+        return tuple(result)
+    
+    def report_export_sizes(self, profile):
+        """Print the size of each exported image against its full-resolution PNG"""
+        if EXPORT_PROFILES[profile]["dpi"] is None:
+            return
+        
+        total_before = total_after = 0
+        seen = set()
+        for i, shot in enumerate(self.screenshots):
+            if (shot['stored'], shot['markup_key']) in seen:
+                continue
+            seen.add((shot['stored'], shot['markup_key']))
+            data, content_type, ext, codec = self.shot_export_bytes(i, profile)
+            before = self.screenshots.png_size(i)
+            if before is None:
+                print(f"  Screenshot {i + 1}: {len(data) // 1024} KB ({codec})")
+                continue
+            total_before += before
+            total_after += len(data)
+            print(f"  Screenshot {i + 1}: {before // 1024} KB -> {len(data) // 1024} KB "
+                  f"({codec}, {before / max(1, len(data)):.1f}x smaller)")
+        if total_after:
+            print(f"✓ Export profile '{profile}': {total_before // 1024} KB -> {total_after // 1024} KB "
+                  f"({total_before / total_after:.1f}x smaller)")
+    
     def end_session(self):
-        """End the session and create Word document"""
-        if not self.screenshots:
+        """End the session and create the Word document on a background thread"""
+        if not self.screenshots and not self.capture_worker.pending():
             messagebox.showinfo("No Screenshots", "No screenshots were taken.")
             return
-            
-        try:
-            # Create Word document
-            doc = Document()
-            
-            # Add screenshots with comments and timestamps
-            for i, shot in enumerate(self.screenshots, 1):
-                # Add screenshot number as text with blue color and bold
-                p = doc.add_paragraph()
-                run = p.add_run(f"Screenshot {i}")
-                run.bold = True
-                run.font.color.rgb = RGBColor(0, 0, 255)  # Blue color
-                
-                # Add timestamp
-                timestamp_text = shot["timestamp"].strftime("%Y-%m-%d %H:%M:%S")
-                doc.add_paragraph(f"Timestamp: {timestamp_text}")
-                
-                # Add comment only if it exists (no blank comment section)
-                if shot["comment"]:
-                    doc.add_paragraph(shot["comment"])
-                
-                # Save image to temporary file and add to document
-                temp_file = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-                shot["image"].save(temp_file.name, "PNG")
-                temp_file.close()
-                
-                # Add image to document
-                doc.add_picture(temp_file.name, width=Inches(5.5))
-                
-                # Clean up temp file
-                os.unlink(temp_file.name)
-                
-                # Add page break except for last screenshot
-                if i < len(self.screenshots):
-                    doc.add_page_break()
-            
-            # Save to a temporary file
+        if self.export_cancel is not None:
+            return
+        # A capture or markup still in progress would land in the middle of the export
+        self.markup_windows = [window for window in self.markup_windows if window.winfo_exists()]
+        if self.is_capturing or self.markup_windows:
+            messagebox.showinfo("Capture In Progress",
+                                "Finish or close the current capture and markup windows, then end the session.")
+            return
+        
+        # Without Word the document has to be kept somewhere
+        open_in_word = self.settings["open_in_word"]
+        if open_in_word:
             temp_docx = tempfile.NamedTemporaryFile(suffix=".docx", delete=False)
-            temp_docx_path = temp_docx.name
             temp_docx.close()
-            doc.save(temp_docx_path)
+            docx_path = temp_docx.name
+        else:
+            docx_path = filedialog.asksaveasfilename(
+                parent=self.root, defaultextension=".docx",
+                filetypes=[("Word Document", "*.docx")],
+                initialfile=f"SnipIT_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx")
+            if not docx_path:
+                return
+        
+        # No more scheduled frames or captures once the document is being written
+        self.stop_scheduled_capture(timeout=2)
+        self.encoder.drain()
+        self.is_capturing = True
+        self.export_cancel = threading.Event()
+        progress = queue.Queue()
+        
+        # Progress window fed from the export thread through the queue
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title("Exporting Screenshots")
+        progress_window.attributes("-topmost", True)
+        progress_window.resizable(False, False)
+        progress_window.protocol("WM_DELETE_WINDOW", self.export_cancel.set)
+        
+        status_label = tk.Label(progress_window, text="Preparing export...", font=("Arial", 9))
+        status_label.pack(padx=10, pady=(10, 5), anchor="w")
+        progress_bar = ttk.Progressbar(progress_window, length=280, mode="determinate")
+        progress_bar.pack(padx=10, pady=5)
+        bytes_label = tk.Label(progress_window, text="", font=("Arial", 8), fg="#666666")
+        bytes_label.pack(padx=10, anchor="w")
+        tk.Button(progress_window, text="Cancel", command=self.export_cancel.set,
+                  bg="#f44336", fg="white", font=("Arial", 8)).pack(pady=(5, 10))
+        
+        def finish(message):
+            progress_window.destroy()
+            self.export_cancel = None
+            self.is_capturing = False
             
-            # Open in Word using COM interface
+            if message[0] == "cancelled":
+                print("✗ Export cancelled, the session is still open")
+            elif message[0] == "error":
+                messagebox.showerror("Error", f"Failed to create document: {message[1]}")
+            else:
+                if not open_in_word:
+                    messagebox.showinfo("Export Complete", f"Screenshots saved to:\n{message[1]}")
+                # Automatically quit the tool after a short delay
+                self.root.after(500, self.root.quit)
+        
+        def poll():
+            try:
+                while True:
+                    message = progress.get_nowait()
+                    if message[0] == "stage":
+                        status_label.config(text=message[1])
+                    elif message[0] in ("encoded", "added"):
+                        done, total = message[1], message[2]
+                        progress_bar.config(maximum=max(1, total), value=done)
+                        verb = "Encoded" if message[0] == "encoded" else "Added"
+                        status_label.config(text=f"{verb} {done} of {total} screenshots")
+                    elif message[0] == "written":
+                        bytes_label.config(text=f"{message[1] / (1024 * 1024):.1f} MB written")
+                    else:
+                        finish(message)
+                        return
+            except queue.Empty:
+                pass
+            progress_window.after(100, poll)
+        
+        self.export_thread = threading.Thread(target=self.run_export,
+                                              args=(docx_path, open_in_word, progress, self.export_cancel),
+                                              daemon=True)
+        self.export_thread.start()
+        poll()
+    
+    def run_export(self, docx_path, open_in_word, progress, cancel):
+        """Export thread: write the document, then optionally hand it to Word"""
+        # Captures still being stored belong in the document, however long that takes
+        if self.capture_worker.pending():
+            progress.put(("stage", "Storing the last screenshots..."))
+        self.capture_worker.drain()
+        try:
+            self.export_document(docx_path, progress, cancel)
+        except ExportCancelled:
+            self.remove_partial_export(docx_path)
+            progress.put(("cancelled",))
+            return
+        except Exception as e:
+            self.remove_partial_export(docx_path)
+            progress.put(("error", str(e)))
+            return
+        
+        # The session is safely in the document now
+        if self.journal:
+            self.journal.discard()
+            self.journal = None
+        
+        if not open_in_word:
+            progress.put(("done", docx_path))
+            return
+        
+        # The file is complete, only now hand it to Word
+        progress.put(("stage", "Opening in Word..."))
+        pythoncom.CoInitialize()
+        try:
             try:
                 word = win32com.client.GetObject(Class="Word.Application")
             except:
@@ -1036,35 +4010,145 @@ nanthishwaran579@gmail.com
             word.Visible = True
             
             # Open the document
-            word_doc = word.Documents.Open(FileName=os.path.abspath(temp_docx_path))
+            word.Documents.Open(FileName=os.path.abspath(docx_path))
             
             # Bring Word to foreground
             word.Activate()
+        except Exception as e:
+            progress.put(("error", f"{e}\nThe document was saved to {docx_path}"))
+            return
+        finally:
+            pythoncom.CoUninitialize()
+        progress.put(("done", docx_path))
+        
+        # Clean up - delete temp file after a delay to ensure Word has loaded it
+        time.sleep(2)
+        try:
+            os.unlink(docx_path)
+        except:
+            pass
+    
+    def remove_partial_export(self, docx_path):
+        """Don't leave a half-written document behind"""
+        try:
+            os.unlink(docx_path)
+        except OSError:
+            pass
+    
+    def export_document(self, docx_path, progress, cancel):
+        """
+        Build the Word document and save it to docx_path. Runs on the export
+        thread and only reports to the progress queue, never touching Tk;
+        raises ExportCancelled once cancel is set.
+        """
+        # Most shots were already encoded in the background at capture
+        # time; encode the rest spread over all cores, in shot order
+        profile = self.settings["export_profile"]
+        progress.put(("stage", "Encoding screenshots..."))
+        self.encode_pending_shots(profile, lambda done, total: progress.put(("encoded", done, total)), cancel)
+        self.report_export_sizes(profile)
+        
+        # Create Word document
+        doc = Document()
+        pictures = StreamingPictureWriter(doc)
+        
+        # Add screenshots with comments and timestamps
+        shots = list(self.screenshots)
+        total = len(shots)
+        for i, shot in enumerate(shots, 1):
+            if cancel.is_set():
+                raise ExportCancelled()
             
-            # Clean up - delete temp file after a delay to ensure Word has loaded it
-            def cleanup_temp():
-                time.sleep(2)
-                try:
-                    os.unlink(temp_docx_path)
-                except:
-                    pass
+            # Add screenshot number as text with blue color and bold
+            p = doc.add_paragraph()
+            run = p.add_run(f"Screenshot {i}")
+            run.bold = True
+            run.font.color.rgb = RGBColor(0, 0, 255)  # Blue color
             
-            cleanup_thread = threading.Thread(target=cleanup_temp, daemon=True)
-            cleanup_thread.start()
+            # Add timestamp
+            timestamp_text = shot["timestamp"].strftime("%Y-%m-%d %H:%M:%S")
+            doc.add_paragraph(f"Timestamp: {timestamp_text}")
             
-            # Automatically quit the tool after a short delay
-            self.root.after(500, self.root.quit)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create document: {str(e)}")
+            # Add comment only if it exists (no blank comment section)
+            if shot["comment"]:
+                doc.add_paragraph(shot["comment"])
+            
+            # Add image to document - the PNG bytes are read from the session
+            # store only while the document is written, and identical
+            # screenshots with identical markups share a single picture part
+            key = (shot['stored'].digest, shot['markup_key'])
+            if EXPORT_PROFILES[profile]["dpi"] is None and not shot['markups']:
+                pictures.add_picture(lambda index=i - 1: self.screenshots.encoded(index),
+                                     shot['stored'].size, Inches(EMBED_WIDTH_INCHES), key=key)
+            else:
+                data, content_type, ext, codec = self.shot_export_bytes(i - 1, profile)
+                pictures.add_picture(lambda index=i - 1: self.shot_export_bytes(index, profile)[0],
+                                     shot['stored'].size, Inches(EMBED_WIDTH_INCHES),
+                                     content_type=content_type, ext=ext, key=key)
+            
+            # Add page break except for last screenshot
+            if i < total:
+                doc.add_page_break()
+            progress.put(("added", i, total))
+        
+        # Stream the document straight into the file, counting what is written
+        progress.put(("stage", "Writing document..."))
+        with open(docx_path, "wb") as f:
+            doc.save(CountingWriter(f, cancel, lambda written: progress.put(("written", written))))
             
     def run(self):
         """Start the application"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if self.scheduler:
+                self.scheduler.stop(timeout=2)
+            if self.replay:
+                self.replay.stop()
+            # Store the captures still queued before the journal is closed
+            self.capture_worker.stop(timeout=5)
+            if self.capture_worker.jobs:
+                print(f"✓ Capture worker: {self.capture_worker.jobs} jobs, "
+                      f"{self.capture_worker.busy_time / self.capture_worker.jobs * 1000:.1f} ms mean")
+            self.windows.stop()
+            if self.windows.lookups:
+                print(f"✓ Window lookups: {self.windows.hits} of {self.windows.lookups} from cache")
+            if self.export_cancel:
+                self.export_cancel.set()
+            # Let a cancelled export remove its partial document
+            if self.export_thread:
+                self.export_thread.join()
+            # Keep the journal for resuming unless the session was empty
+            if self.journal:
+                if self.screenshots:
+                    self.journal.close()
+                else:
+                    self.journal.discard()
+            if self.capture_requests.dropped or self.capture_requests.coalesced:
+                print(f"✓ Capture queue: {self.capture_requests.dropped} presses dropped, "
+                      f"{self.capture_requests.coalesced} coalesced")
+            if self.hotkeys:
+                self.hotkeys.stop()
+                for name, (presses, mean, worst) in self.hotkeys.latency_summary().items():
+                    print(f"✓ Hotkey '{name}': {presses} presses, "
+                          f"{mean * 1000:.0f} ms mean / {worst * 1000:.0f} ms max latency")
+            grabs, latency, rate, megapixels = self.capture.stats()
+            if grabs:
+                print(f"✓ Capture backend '{self.capture.name}': {grabs} grabs, "
+                      f"{latency * 1000:.1f} ms mean, {rate:.1f} grabs/s, {megapixels:.0f} MP/s")
+            self.capture.close()
+            grabs = sorted(t["grabbed"] for t in self.capture_timings if "grabbed" in t)
+            if grabs:
+                print(f"✓ Trigger to grab: {grabs[len(grabs) // 2]:.0f} ms median / "
+                      f"{grabs[int(len(grabs) * 0.95)]:.0f} ms p95 over {len(grabs)} captures")
+            # Remove any screenshots spilled to disk during the session
+            self.screenshots.close()
 
 
 def main():
     """Main entry point"""
+    # Needed for the export process pool in the frozen executable
+    multiprocessing.freeze_support()
     app = ScreenshotTool()
     app.run()
 
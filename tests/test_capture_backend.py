@@ -0,0 +1,40 @@
+from main import CAPTURE_BACKENDS, SyntheticCaptureBackend, create_capture_backend, frame_difference, frame_sample
+
+
+def test_synthetic_backend_is_registered():
+    assert isinstance(create_capture_backend("synthetic"), SyntheticCaptureBackend)
+    assert CAPTURE_BACKENDS["synthetic"] is SyntheticCaptureBackend
+
+
+def test_synthetic_grab_sizes():
+    backend = SyntheticCaptureBackend(size=(640, 360))
+    assert backend.grab().size == (640, 360)
+    assert backend.grab(bbox=(10, 20, 110, 70)).size == (100, 50)
+
+
+def test_consecutive_frames_differ_slightly():
+    backend = SyntheticCaptureBackend(size=(640, 360))
+    first, second = backend.grab(), backend.grab()
+    assert first.tobytes() != second.tobytes()
+    assert 0 < frame_difference(frame_sample(first), frame_sample(second)) < 0.5
+
+
+def test_stats_after_grabs():
+    backend = SyntheticCaptureBackend(size=(320, 200))
+    assert backend.stats() == (0, 0.0, 0.0, 0.0)
+    
+    for _ in range(5):
+        backend.grab()
+    backend.grab(bbox=(0, 0, 100, 100))
+    
+    grabs, latency, rate, megapixels = backend.stats()
+    assert grabs == 6
+    assert backend.pixels == 5 * 320 * 200 + 100 * 100
+    assert latency > 0 and rate > 0 and megapixels > 0
+    assert abs(rate - 1 / latency) < 1e-6 * rate
+
+
+def test_synthetic_frames_are_reproducible():
+    first, second = SyntheticCaptureBackend(size=(320, 200)), SyntheticCaptureBackend(size=(320, 200))
+    for _ in range(3):
+        assert first.grab().tobytes() == second.grab().tobytes()
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from main import FakeHotkeyBackend, HotkeyManager, parse_hotkey
+
+
+def test_parse_hotkey_modifiers_and_keys():
+    assert parse_hotkey("ctrl+alt+f") == (0x0002 | 0x0001, ord("F"))
+    assert parse_hotkey("Ctrl + Shift + 5") == (0x0002 | 0x0004, ord("5"))
+    assert parse_hotkey("win+printscreen") == (0x0008, 0x2C)
+    assert parse_hotkey("alt+f12") == (0x0001, 0x7B)
+
+
+@pytest.mark.parametrize("combo", ["ctrl+alt", "ctrl+bogus", "alt+f25", ""])
+def test_parse_hotkey_rejects_invalid(combo):
+    with pytest.raises(ValueError):
+        parse_hotkey(combo)
+
+
+def make_manager(combos):
+    backend = FakeHotkeyBackend()
+    dispatched = []
+    manager = HotkeyManager(backend, combos, dispatched.append)
+    return manager, backend, dispatched
+
+
+def test_start_registers_only_valid_bound_combos():
+    manager, backend, _ = make_manager({"full": "ctrl+alt+f", "partial": "ctrl+nope", "window": "ctrl+alt+w"})
+    manager.bind("full", lambda pressed_at: None)
+    manager.bind("partial", lambda pressed_at: None)
+    
+    bindings = manager.start()
+    
+    assert bindings == {"full": (0x0003, ord("F"))}
+    assert backend.bindings == bindings
+
+
+def test_press_is_dispatched_and_runs_action_with_press_time():
+    manager, backend, dispatched = make_manager({"full": "ctrl+alt+f", "window": "ctrl+alt+w"})
+    calls = []
+    manager.bind("full", lambda pressed_at: calls.append(("full", pressed_at)))
+    manager.bind("window", lambda pressed_at: calls.append(("window", pressed_at)))
+    manager.start()
+    
+    pressed_at = time.perf_counter()
+    backend.press("window", pressed_at)
+    backend.press("unbound")
+    
+    # Nothing runs until the dispatcher (the Tk thread in the app) runs it
+    assert calls == [] and len(dispatched) == 1
+    dispatched.pop()()
+    assert calls == [("window", pressed_at)]
+
+
+def test_latency_is_recorded_per_action():
+    manager, backend, dispatched = make_manager({"full": "ctrl+alt+f"})
+    manager.bind("full", lambda pressed_at: None)
+    manager.start()
+    
+    now = time.perf_counter()
+    backend.press("full", now - 0.05)
+    backend.press("full", now - 0.01)
+    for run in dispatched:
+        run()
+    
+    presses, mean, worst = manager.latency_summary()["full"]
+    assert presses == 2
+    assert 0.01 <= mean <= worst
+    assert worst >= 0.05
+
+
+def test_stop_disconnects_backend():
+    manager, backend, dispatched = make_manager({"full": "ctrl+alt+f"})
+    manager.bind("full", lambda pressed_at: None)
+    manager.start()
+    manager.stop()
+    
+    backend.press("full")
+    assert dispatched == []
+    assert manager.latency_summary() == {}
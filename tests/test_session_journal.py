@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from PIL import Image
+
+from main import SessionJournal, SessionStore
+
+
+def make_store(count):
+    store = SessionStore()
+    for shade in range(count):
+        store.append({'image': Image.new("RGB", (8, 8), (shade * 40, 0, 0)),
+                      'comment': str(shade), 'timestamp': datetime.now()})
+    return store
+
+
+def test_failed_record_skips_only_that_shot(tmp_path):
+    store = make_store(4)
+    journal = SessionJournal(store, str(tmp_path / "session.journal"), batch_ms=500)
+    frame = journal._frame
+    
+    def failing_frame(item):
+        if item == ("shot", 1):
+            raise RuntimeError("disk full")
+        return frame(item)
+    journal._frame = failing_frame
+    
+    for index in range(4):
+        journal.add(index)
+    journal.update_markups(1, [["pen"]])
+    journal.update_markups(3, [["arrow"]])
+    journal.close()
+    
+    shots, edits, _ = SessionJournal.read(journal.path)
+    assert [shot['comment'] for shot in shots] == ["0", "2", "3"]
+    # The edit of the lost shot is dropped, the other follows its shot
+    assert edits == [(2, [["arrow"]])]
@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from main import SessionStore, TileDeltaCodec, encode_export
+
+
+def frames(mode, size, count, seed=0):
+    """A random frame followed by count - 1 frames with a few changed pixels each"""
+    rng = np.random.default_rng(seed)
+    channels = {"L": 1, "RGB": 3, "RGBA": 4}[mode]
+    pixels = rng.integers(0, 256, (size[1], size[0], channels), dtype=np.uint8)
+    images = []
+    for _ in range(count):
+        images.append(Image.fromarray(pixels[:, :, 0] if channels == 1 else pixels.copy(), mode))
+        y, x = rng.integers(0, size[1]), rng.integers(0, size[0])
+        pixels[y, x] ^= 128
+    return images
+
+
+def test_delta_codec_round_trip_across_keyframes_sizes_and_modes():
+    codec = TileDeltaCodec(tile_size=16, keyframe_interval=3)
+    images = (frames("RGB", (70, 50), 7) + frames("RGB", (40, 33), 3, seed=1)
+              + frames("L", (64, 64), 4, seed=2) + frames("RGBA", (50, 20), 4, seed=3))
+    encoded = [codec.encode(image) for image in images]
+    
+    for image, frame in zip(images, encoded):
+        decoded = codec.decode(frame)
+        assert decoded.mode == image.mode
+        assert decoded.tobytes() == image.tobytes()
+    # Between keyframes only the changed tile is stored
+    assert len(encoded[1].indices) == 1
+
+
+def test_delta_codec_stores_changes_that_a_word_sum_would_cancel():
+    codec = TileDeltaCodec(tile_size=64)
+    first = np.full((64, 64), 40, dtype=np.uint8)
+    second = first.copy()
+    second[0, 7] = second[0, 15] = 168
+    codec.encode(Image.fromarray(first))
+    frame = codec.encode(Image.fromarray(second))
+    
+    assert np.array_equal(np.asarray(codec.decode(frame)), second)
+
+
+def store_shots(store, images, markups):
+    for image, shot_markups in zip(images, markups):
+        store.append({'image': image, 'comment': '', 'timestamp': datetime.now(), 'markups': shot_markups})
+
+
+def test_delta_store_round_trip_with_spilled_frames(tmp_path):
+    store = SessionStore(hot_images=1, memory_budget_mb=0.001, session_dir=str(tmp_path),
+                         storage_mode="delta", tile_size=16, keyframe_interval=4)
+    images = frames("RGB", (90, 60), 10)
+    store_shots(store, images, [[]] * len(images))
+    
+    assert any(name.endswith(".delta") for name in os.listdir(tmp_path))
+    assert store.memory_used <= store.memory_budget + 90 * 60 * 3
+    store.delta._cache = (None, None)
+    for index, image in enumerate(images):
+        assert store.image(index).tobytes() == image.tobytes()
+
+
+def test_archival_export_matches_between_tiered_and_delta(tmp_path):
+    images = frames("RGB", (90, 60), 6)
+    markups = [[], [{"type": "rectangle", "color": "red", "x1": 5, "y1": 5, "x2": 40, "y2": 30}],
+               [], [], [{"type": "draw", "color": "blue", "points": [(1, 1), (20, 30), (60, 10)]}], []]
+    tiered = SessionStore(storage_mode="tiered")
+    delta = SessionStore(hot_images=1, memory_budget_mb=0.001, session_dir=str(tmp_path),
+                         storage_mode="delta", tile_size=16, keyframe_interval=4)
+    store_shots(tiered, images, markups)
+    store_shots(delta, images, markups)
+    
+    for index in range(len(images)):
+        if markups[index]:
+            exports = [encode_export((store.export_source(index), store.markups(index)), "archival")
+                       for store in (tiered, delta)]
+            assert exports[0] == exports[1]
+        else:
+            assert tiered.encoded(index) == delta.encoded(index)
+
+
+def test_remove_stale_sessions_keeps_live_owners(tmp_path, monkeypatch):
+    monkeypatch.setattr(SessionStore, "SESSIONS_DIR", str(tmp_path))
+    finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                              capture_output=True, text=True)
+    dead_pid = int(finished.stdout)
+    for name in (f"20260101_000000_{os.getpid()}", f"20260101_000000_{dead_pid}", "20250101_000000"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "shot_0001.png").write_bytes(b"png")
+    
+    SessionStore.remove_stale_sessions()
+    
+    assert sorted(os.listdir(tmp_path)) == [f"20260101_000000_{os.getpid()}"]